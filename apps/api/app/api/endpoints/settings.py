@@ -1,9 +1,10 @@
 """Settings management endpoints for customizable LLM prompts"""
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pydantic import BaseModel
+import json
 import logging
 from datetime import datetime
 
@@ -11,6 +12,7 @@ from app.database import get_async_session
 from app.models.settings import SystemPromptTemplate, SystemPromptTemplateCreate, SystemPromptTemplateUpdate
 from app.services.settings_service import SettingsService
 from app.services.feedback_learning_service import FeedbackLearningService
+from app.core.pipeline.steps.analyzer_agents import MultiAgentOrchestrator
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/settings", tags=["settings"])
@@ -83,13 +85,35 @@ LLM_STEP_DEFINITIONS = {
     }
 }
 
+# Agent definitions indexed by step and agent type for validation and default lookups
+STEP_AGENT_DEFINITIONS: Dict[str, Dict[str, Dict[str, str]]] = {
+    step_name: {agent["type"]: agent for agent in step_def["agents"]}
+    for step_name, step_def in LLM_STEP_DEFINITIONS.items()
+}
+
+# Built-in (system_prompt, description) served when no custom template is active;
+# keyed by (step_name, agent_type) with agent_type None for the step prompt itself
+DEFAULT_PROMPT_TEMPLATES: Dict[Tuple[str, Optional[str]], Tuple[str, str]] = {}
+for _step_name, _step_def in LLM_STEP_DEFINITIONS.items():
+    DEFAULT_PROMPT_TEMPLATES[(_step_name, None)] = (
+        _step_def["default_prompt"], f"Default prompt for {_step_def['description']}"
+    )
+    for _agent in _step_def["agents"]:
+        DEFAULT_PROMPT_TEMPLATES[(_step_name, _agent["type"])] = (
+            _agent["default_prompt"], f"Default prompt for {_agent['description']}"
+        )
+
+# The step catalog is static, so serialize its response once instead of on every request
+LLM_STEPS_RESPONSE_BODY = json.dumps(
+    {"steps": LLM_STEP_DEFINITIONS, "total_steps": len(LLM_STEP_DEFINITIONS)},
+    ensure_ascii=False,
+    separators=(",", ":")
+).encode("utf-8")
+
 @router.get("/llm-steps")
 async def get_llm_steps():
     """Get available LLM steps and their descriptions"""
-    return {
-        "steps": LLM_STEP_DEFINITIONS,
-        "total_steps": len(LLM_STEP_DEFINITIONS)
-    }
+    return Response(content=LLM_STEPS_RESPONSE_BODY, media_type="application/json")
 
 @router.get("/prompts")
 async def list_prompt_templates(
@@ -162,23 +186,20 @@ async def create_prompt_template(
 ) -> PromptTemplateResponse:
     """Create a new prompt template"""
     try:
-        # Validate step_name
-        if request.step_name not in LLM_STEP_DEFINITIONS:
+        # Validate step_name (one lookup both checks the step and fetches its agents)
+        step_agents = STEP_AGENT_DEFINITIONS.get(request.step_name)
+        if step_agents is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid step_name. Must be one of: {list(LLM_STEP_DEFINITIONS.keys())}"
             )
         
         # Validate agent_type if provided
-        if request.agent_type:
-            step_def = LLM_STEP_DEFINITIONS[request.step_name]
-            if step_def["agents"]:
-                valid_agents = [agent["type"] for agent in step_def["agents"]]
-                if request.agent_type not in valid_agents:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Invalid agent_type for {request.step_name}. Must be one of: {valid_agents}"
-                    )
+        if request.agent_type and step_agents and request.agent_type not in step_agents:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid agent_type for {request.step_name}. Must be one of: {list(step_agents)}"
+            )
         
         settings_service = SettingsService(db_session)
         template_data = SystemPromptTemplateCreate(
@@ -190,6 +211,7 @@ async def create_prompt_template(
         )
         
         template = await settings_service.create_prompt_template(template_data)
+        MultiAgentOrchestrator.invalidate_caches()
         
         return PromptTemplateResponse(
             id=template.id,
@@ -226,6 +248,7 @@ async def update_prompt_template(
         # Create update data
         update_data = SystemPromptTemplateUpdate(**request.dict(exclude_unset=True))
         template = await settings_service.update_prompt_template(template_id, update_data)
+        MultiAgentOrchestrator.invalidate_caches()
         
         return PromptTemplateResponse(
             id=template.id,
@@ -257,6 +280,7 @@ async def delete_prompt_template(
         if not success:
             raise HTTPException(status_code=404, detail="Prompt template not found")
         
+        MultiAgentOrchestrator.invalidate_caches()
         return {"message": "Prompt template deleted successfully"}
         
     except HTTPException:
@@ -272,37 +296,37 @@ async def initialize_default_prompts(
     """Initialize default prompt templates for all steps"""
     try:
         settings_service = SettingsService(db_session)
-        created_count = 0
+        default_templates = []
         
         for step_name, step_def in LLM_STEP_DEFINITIONS.items():
-            # Create main step prompt
-            existing = await settings_service.get_active_prompt_template(step_name, None)
-            if not existing:
-                await settings_service.create_prompt_template(
+            # Main step prompt
+            default_templates.append(
+                SystemPromptTemplateCreate(
+                    step_name=step_name,
+                    agent_type=None,
+                    system_prompt=step_def["default_prompt"],
+                    description=f"Default system prompt for {step_def['description']}",
+                    is_active=True
+                )
+            )
+            
+            # Agent-specific prompts
+            for agent in step_def.get("agents", []):
+                default_templates.append(
                     SystemPromptTemplateCreate(
                         step_name=step_name,
-                        agent_type=None,
-                        system_prompt=step_def["default_prompt"],
-                        description=f"Default system prompt for {step_def['description']}",
+                        agent_type=agent["type"],
+                        system_prompt=agent["default_prompt"],
+                        description=f"Default prompt for {agent['description']}",
                         is_active=True
                     )
                 )
-                created_count += 1
-            
-            # Create agent-specific prompts
-            for agent in step_def.get("agents", []):
-                existing_agent = await settings_service.get_active_prompt_template(step_name, agent["type"])
-                if not existing_agent:
-                    await settings_service.create_prompt_template(
-                        SystemPromptTemplateCreate(
-                            step_name=step_name,
-                            agent_type=agent["type"],
-                            system_prompt=agent["default_prompt"],
-                            description=f"Default prompt for {agent['description']}",
-                            is_active=True
-                        )
-                    )
-                    created_count += 1
+        
+        # Insert only the missing defaults in one batch
+        created_count = await settings_service.create_missing_templates(default_templates)
+        
+        if created_count:
+            MultiAgentOrchestrator.invalidate_caches()
         
         return {
             "message": f"Initialized {created_count} default prompt templates",
@@ -325,23 +349,13 @@ async def get_active_prompt_for_step(
         template = await settings_service.get_active_prompt_template(step_name, agent_type)
         
         if not template:
-            # Return default if no custom template exists
-            if step_name in LLM_STEP_DEFINITIONS:
-                step_def = LLM_STEP_DEFINITIONS[step_name]
-                
-                if agent_type:
-                    # Find agent default
-                    agent_def = next((agent for agent in step_def.get("agents", []) if agent["type"] == agent_type), None)
-                    if agent_def:
-                        default_prompt = agent_def["default_prompt"]
-                        description = f"Default prompt for {agent_def['description']}"
-                    else:
-                        raise HTTPException(status_code=404, detail=f"Agent type {agent_type} not found for step {step_name}")
-                else:
-                    default_prompt = step_def["default_prompt"]
-                    description = f"Default prompt for {step_def['description']}"
+            # Return default if no custom template exists (an empty agent_type means the step's own prompt)
+            default_template = DEFAULT_PROMPT_TEMPLATES.get((step_name, agent_type or None))
+            if default_template:
+                default_prompt, description = default_template
                 
                 # Return virtual template (not saved in DB)
+                now = datetime.utcnow()
                 return PromptTemplateResponse(
                     id="default",
                     step_name=step_name,
@@ -349,10 +363,12 @@ async def get_active_prompt_for_step(
                     system_prompt=default_prompt,
                     description=description,
                     is_active=True,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
+                    created_at=now,
+                    updated_at=now
                 )
             
+            if agent_type and step_name in LLM_STEP_DEFINITIONS:
+                raise HTTPException(status_code=404, detail=f"Agent type {agent_type} not found for step {step_name}")
             raise HTTPException(status_code=404, detail="No active prompt template found for this step")
         
         return PromptTemplateResponse(
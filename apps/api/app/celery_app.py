@@ -1,7 +1,10 @@
 """Celery application configuration for background task processing"""
 
+import threading
 from celery import Celery
+from celery.signals import worker_process_init
 from app.config import settings
+from app.utils.token_counter import load_tokenizer
 
 # Create Celery application
 celery_app = Celery(
@@ -88,6 +91,11 @@ celery_app.conf.task_annotations = {
     }
 }
 
+@worker_process_init.connect
+def _load_worker_tokenizer(**kwargs):
+    """Load the tokenizer in the background so worker startup never waits on a download."""
+    threading.Thread(target=load_tokenizer, name="tokenizer-load", daemon=True).start()
+
 # Health check task
 @celery_app.task
 def health_check():
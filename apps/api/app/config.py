@@ -26,6 +26,19 @@ class Settings(BaseSettings):
     database_url: Optional[str] = None
     database_max_connections: int = 20
     database_ssl_require: bool = False
+    # Shared async connection pool (per API worker process)
+    db_pool_size: int = 10
+    db_pool_overflow: int = 5
+    # Ping pooled asyncpg connections on checkout. Off by default: pre-ping has caused race
+    # conditions with asyncpg, and pool_recycle plus disconnect invalidation cover stale connections.
+    db_pool_pre_ping: bool = False
+    # Open db_pool_size connections at startup so the first requests don't pay connect latency
+    warm_pool_on_startup: bool = True
+    # Prepared statements cached per asyncpg connection. Behind PgBouncer in
+    # transaction mode a statement can't be reused on the next transaction's
+    # server connection, so pg_pooler_mode="transaction" turns the cache off.
+    pg_pooler_mode: str = "session"
+    pg_statement_cache_size: int = 1024
     
     # File Upload
     max_file_size_mb: int = 10
@@ -75,6 +88,16 @@ class Settings(BaseSettings):
     step4_scaleway_model: str = "llama-3.3-70b-instruct"
     step5_scaleway_model: str = "llama-3.3-70b-instruct"
     
+    # Analyzer agent triage: a small model screens each agent's focus area and
+    # only documents scoring at least the threshold (0-100) get the full analysis.
+    # An empty provider uses the threat generation (step 2) provider.
+    agent_triage_enabled: bool = False
+    agent_triage_threshold: int = 30
+    agent_triage_llm_provider: str = ""
+    agent_triage_ollama_model: str = "llama3:8b"
+    agent_triage_azure_model: str = "gpt-4o-mini"
+    agent_triage_scaleway_model: str = "llama-3.1-8b-instruct"
+    
     # Security
     secret_key: str = "change-this-in-production"
     jwt_algorithm: str = "HS256"
@@ -1,6 +1,7 @@
 """LLM Provider Factory and Base Classes"""
 
 import os
+from types import MappingProxyType
 from typing import Optional
 from app.core.llm.base import BaseLLMProvider
 from app.core.llm.ollama import OllamaProvider
@@ -12,6 +13,21 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Pipeline step name -> settings key prefix for its provider/model configuration (read-only)
+STEP_CONFIG_PREFIXES = MappingProxyType({
+    "dfd_extraction": "step1",
+    "threat_generation": "step2",
+    "threat_refinement": "step3",
+    "attack_path_analysis": "step4",
+    "threat_triage": "agent_triage",
+    "default": "step1"
+})
+
+# Steps that use another step's provider when their own provider setting is empty
+STEP_PROVIDER_FALLBACKS = MappingProxyType({
+    "threat_triage": "threat_generation"
+})
+
 async def get_llm_provider(step: str = "default") -> BaseLLMProvider:
     """
     Get the appropriate LLM provider for a pipeline step.
@@ -25,21 +41,16 @@ async def get_llm_provider(step: str = "default") -> BaseLLMProvider:
     Raises:
         ValueError: If no valid provider is configured
     """
-    # Map step names to configuration keys
-    step_mapping = {
-        "dfd_extraction": "step1",
-        "threat_generation": "step2", 
-        "threat_refinement": "step3",
-        "attack_path_analysis": "step4",
-        "default": "step1"
-    }
-    
-    step_prefix = step_mapping.get(step, "step1")
+    step_prefix = STEP_CONFIG_PREFIXES.get(step, "step1")
     
     # Get provider type from settings
-    provider_type = getattr(settings, f"{step_prefix}_llm_provider", "ollama").lower()
+    provider_type = getattr(settings, f"{step_prefix}_llm_provider", "ollama")
+    if not provider_type and step in STEP_PROVIDER_FALLBACKS:
+        fallback_prefix = STEP_CONFIG_PREFIXES[STEP_PROVIDER_FALLBACKS[step]]
+        provider_type = getattr(settings, f"{fallback_prefix}_llm_provider", "ollama")
+    provider_type = provider_type.lower()
     
-    logger.info(f"Getting LLM provider for step '{step}': {provider_type}")
+    logger.info("Getting LLM provider for step '%s': %s", step, provider_type)
     
     try:
         if provider_type == "ollama":
@@ -85,7 +96,7 @@ async def get_llm_provider(step: str = "default") -> BaseLLMProvider:
             raise ValueError(f"Unknown LLM provider: {provider_type}")
     
     except Exception as e:
-        logger.warning(f"Failed to initialize {provider_type} LLM provider: {e}")
+        logger.warning("Failed to initialize %s LLM provider: %s", provider_type, e)
         logger.info("Falling back to mock LLM provider for development/testing")
         return MockLLMProvider()
 
@@ -110,13 +121,14 @@ async def get_system_prompt_for_step(
     """
     if db_session:
         try:
+            # Imported here so the LLM package doesn't pull in the database layer at import time
             from app.services.settings_service import SettingsService
             settings_service = SettingsService(db_session)
             return await settings_service.get_system_prompt_for_step(
                 step_name, agent_type, fallback_prompt
             )
         except Exception as e:
-            logger.warning(f"Failed to get custom prompt for {step_name}/{agent_type}: {e}")
+            logger.warning("Failed to get custom prompt for %s/%s: %s", step_name, agent_type, e)
     
     # Fall back to provided fallback_prompt or generic default
     if fallback_prompt:
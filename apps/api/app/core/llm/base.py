@@ -1,12 +1,45 @@
 """Base classes for LLM providers"""
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 from pydantic import BaseModel
+import asyncio
+import json
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP client for LLM providers so concurrent calls reuse pooled keep-alive connections.
+# With a local Ollama backend, raise OLLAMA_NUM_PARALLEL so pooled requests are served concurrently.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the HTTP client shared by all LLM providers.
+    
+    A new client is created if none exists yet, it was closed, or the running
+    event loop changed (e.g. Celery tasks running their own loop).
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=300.0
+        )
+        _http_client_loop = loop
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (application shutdown)."""
+    global _http_client, _http_client_loop
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
 class LLMResponse(BaseModel):
     """Standard response from LLM providers"""
     content: str
@@ -43,6 +76,29 @@ class BaseLLMProvider(ABC):
         """
         pass
     
+    async def stream_generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream_metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the response text in chunks as the LLM produces it.
+        Providers without streaming support yield the complete response once.
+        When stream_metadata is given, the response's finish_reason is stored in it.
+        """
+        response = await self.generate(
+            prompt,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if stream_metadata is not None and response.metadata:
+            stream_metadata["finish_reason"] = response.metadata.get("finish_reason")
+        yield response.content
+    
     @abstractmethod
     async def validate_connection(self) -> bool:
         """
@@ -82,7 +138,6 @@ class BaseLLMProvider(ABC):
                 )
                 
                 # Try to parse the response as JSON
-                import json
                 data = json.loads(response.content)
                 return response_model(**data)
                 
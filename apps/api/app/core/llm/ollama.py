@@ -1,6 +1,5 @@
-import httpx
 from typing import Optional
-from app.core.llm.base import BaseLLMProvider, LLMResponse
+from app.core.llm.base import BaseLLMProvider, LLMResponse, get_http_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,27 +23,25 @@ class OllamaProvider(BaseLLMProvider):
             "stream": False
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, timeout=60.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                return LLMResponse(
-                    content=data.get("response", ""),
-                    model=self.config["model"],
-                    provider="ollama"
-                )
-            except Exception as e:
-                logger.error(f"Ollama generation error: {e}")
-                raise
+        try:
+            response = await get_http_client().post(url, json=payload, timeout=60.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            return LLMResponse(
+                content=data.get("response", ""),
+                model=self.config["model"],
+                provider="ollama"
+            )
+        except Exception as e:
+            logger.error(f"Ollama generation error: {e}")
+            raise
     
     async def validate_connection(self) -> bool:
         url = f"{self.config['base_url']}/api/tags"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, timeout=5.0)
-                return response.status_code == 200
-            except:
-                return False
\ No newline at end of file
+        try:
+            response = await get_http_client().get(url, timeout=5.0)
+            return response.status_code == 200
+        except:
+            return False
\ No newline at end of file
@@ -2,8 +2,8 @@
 
 import httpx
 import json
-from typing import Optional, Dict, Any
-from app.core.llm.base import BaseLLMProvider, LLMResponse
+from typing import Optional, Dict, Any, AsyncIterator
+from app.core.llm.base import BaseLLMProvider, LLMResponse, get_http_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,13 +20,10 @@ class ScalewayProvider(BaseLLMProvider):
         super().__init__(model)
         self.api_key = api_key
         self.endpoint = endpoint.rstrip('/')
-        self.client = httpx.AsyncClient(
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            timeout=300.0  # 5 minute timeout
-        )
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
     
     async def generate(
         self,
@@ -37,25 +34,14 @@ class ScalewayProvider(BaseLLMProvider):
     ) -> LLMResponse:
         """Generate response using Scaleway AI"""
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": False
-        }
-        
-        if max_tokens:
-            payload["max_tokens"] = max_tokens
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens, stream=False)
         
         try:
-            response = await self.client.post(
+            response = await get_http_client().post(
                 f"{self.endpoint}/chat/completions",
-                json=payload
+                json=payload,
+                headers=self.headers,
+                timeout=300.0  # 5 minute timeout
             )
             response.raise_for_status()
             
@@ -87,6 +73,81 @@ class ScalewayProvider(BaseLLMProvider):
             logger.error(f"Failed to generate with Scaleway: {e}")
             raise
     
+    async def stream_generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream_metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text from Scaleway AI (OpenAI-compatible server-sent events)"""
+        
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens, stream=True)
+        
+        try:
+            async with get_http_client().stream(
+                "POST",
+                f"{self.endpoint}/chat/completions",
+                json=payload,
+                headers=self.headers,
+                timeout=300.0  # 5 minute timeout
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    
+                    choices = event.get("choices") or [{}]
+                    finish_reason = choices[0].get("finish_reason")
+                    if finish_reason and stream_metadata is not None:
+                        stream_metadata["finish_reason"] = finish_reason
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+                        
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Scaleway API streaming error: {e.response.status_code}")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to stream with Scaleway: {e}")
+            raise
+    
+    def _build_payload(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool
+    ) -> Dict[str, Any]:
+        """Build the chat completions request payload"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": stream
+        }
+        
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        
+        return payload
+    
     async def validate_connection(self) -> bool:
         """Check if Scaleway AI is accessible"""
         try:
@@ -105,4 +166,5 @@ class ScalewayProvider(BaseLLMProvider):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
\ No newline at end of file
+        # The HTTP client is shared across providers and closed on application shutdown
+        pass
\ No newline at end of file
@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 from app.core.llm.base import BaseLLMProvider, LLMResponse
 from app.models.dfd import DFDComponents, DataFlow
 from app.utils.token_counter import TokenCounter
+from app.utils.prompt_template import PromptTemplate
 from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
@@ -57,6 +58,7 @@ Input Documents:
 
 Output ONLY the JSON, with no additional commentary or formatting.
 """
+EXTRACT_PROMPT = PromptTemplate(EXTRACT_PROMPT_TEMPLATE)
 
 async def extract_dfd_from_text(
     llm_provider: BaseLLMProvider,
@@ -74,7 +76,7 @@ async def extract_dfd_from_text(
     Returns:
         Tuple of (DFDComponents model with extracted information, token usage data)
     """
-    prompt = EXTRACT_PROMPT_TEMPLATE.format(documents=document_text)  # No character limit
+    prompt = EXTRACT_PROMPT.render(documents=document_text)  # No character limit
     
     logger.info(f"Extracting DFD components using {llm_provider.__class__.__name__}")
     
@@ -8,25 +8,190 @@ This module implements specialized analyzer agents that examine systems from dif
 3. Compliance & Governance Agent - Views system through auditor's lens
 """
 
+import os
 import re
+import copy
+import asyncio
 import json
+import time
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from itertools import chain
+from typing import Dict, Any, List, Optional, Tuple, Deque
 from datetime import datetime
 from abc import ABC, abstractmethod
-from app.core.llm import get_llm_provider, get_system_prompt_for_step
+from app.config import settings
+from app.core.llm import STEP_CONFIG_PREFIXES, get_llm_provider, get_system_prompt_for_step
+from app.core.llm.mock import MockLLMProvider
 from app.utils.token_counter import TokenCounter
+from .constants import HIGH_RISK_LEVELS
 
 logger = logging.getLogger(__name__)
 
+# Opening of every agent prompt. The agents get identical documentation and components,
+# so keeping their role-specific instructions after this block lets providers with
+# prefix caching (vLLM, OpenAI, Scaleway) reuse the shared prompt prefix across agents.
+SHARED_CONTEXT_PREAMBLE = (
+    "You are one of several specialist security analysts reviewing the same system. "
+    "Each analyst receives the documentation and components below and reports risks from their own perspective."
+)
+
+# Sort rank of agent threat severities (unknown values rank as Medium)
+SEVERITY_ORDER = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+
+# Compliance frameworks whose implementation gaps are reported as High severity
+HIGH_SEVERITY_FRAMEWORKS = frozenset({'pci_dss', 'hipaa'})
+
+# Full-response JSON parsing runs here so concurrent agents don't block the event loop
+PARSE_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="agent-parse")
+
+# DFD sections included when serializing components into agent prompts
+COMPONENT_SECTIONS = (
+    'external_entities', 'processes', 'assets', 'data_stores', 'data_flows', 'trust_boundaries'
+)
+
+# Sections of the short names-only summary used for triage: (key, label, max names)
+COMPONENT_SUMMARY_SECTIONS = (
+    ('external_entities', 'External Entities', 5),
+    ('processes', 'Processes', 8),
+    ('assets', 'Data Assets', 5),
+    ('data_stores', 'Data Stores', 5),
+    ('trust_boundaries', 'Trust Boundaries', 5),
+)
+
+
+# Set by an agent whose findings are partial (interrupted stream, rule-based fallback).
+# Each agent runs in its own task, so the flag is scoped to that agent's run.
+AGENT_RESULT_INCOMPLETE: ContextVar[bool] = ContextVar('agent_result_incomplete', default=False)
+
+# Immutable JSON value types that copies of findings can share
+JSON_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _copy_findings(findings: Any) -> Any:
+    """
+    Deep-copy JSON-shaped findings (dicts, lists and scalars) with an explicit stack.
+    
+    Skips copy.deepcopy's per-node dispatch for threat lists, which are plain LLM/JSON data.
+    Containers shared between buckets stay shared in the copy; any other object
+    type falls back to copy.deepcopy.
+    """
+    copies: Dict[int, Any] = {}
+    stack: List[Tuple[Any, Any]] = []
+    
+    def copy_node(node: Any) -> Any:
+        node_type = type(node)
+        if node_type in JSON_SCALAR_TYPES:
+            return node
+        if node_type is dict or node_type is list:
+            existing = copies.get(id(node))
+            if existing is None:
+                existing = copies[id(node)] = {} if node_type is dict else []
+                stack.append((node, existing))
+            return existing
+        return copy.deepcopy(node)
+    
+    root = copy_node(findings)
+    while stack:
+        source, target = stack.pop()
+        if type(source) is dict:
+            for key, value in source.items():
+                target[key] = copy_node(value)
+        else:
+            target.extend([copy_node(value) for value in source])
+    return root
+
 
 class BaseAnalyzerAgent(ABC):
     """Base class for all specialized analyzer agents."""
     
+    # Agent type used to look up custom prompt templates (see settings LLM_STEP_DEFINITIONS)
+    agent_type: Optional[str] = None
+    # System prompt used when no custom template is configured
+    fallback_prompt = "You are a helpful AI assistant specialized in cybersecurity analysis."
+    # Defaults applied to LLM threats missing these fields
+    threat_defaults: Dict[str, str] = {}
+    # MultiAgentOrchestrator findings bucket for this agent's threats
+    findings_key: Optional[str] = None
+    
+    # Resolved system prompts shared by all agents: {(step_name, agent_type): (resolved_at, prompt)}
+    SYSTEM_PROMPT_CACHE_TTL = 60.0
+    _system_prompt_cache: Dict[Tuple[str, Optional[str]], Tuple[float, str]] = {}
+    
+    # Adaptive max_tokens: size requests from the p95 of recently observed output lengths
+    DEFAULT_MAX_TOKENS = 2000
+    MIN_MAX_TOKENS = 512
+    MAX_TOKENS_HEADROOM = 1.2
+    OUTPUT_HISTORY_WINDOW = 200
+    OUTPUT_HISTORY_MIN_SAMPLES = 20
+    _output_token_history: Dict[Optional[str], Deque[int]] = {}
+    
+    # Parsed threats for recently analyzed prompts, keyed by prompt content hash
+    RESPONSE_CACHE_SIZE = 128
+    _response_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    
+    # Prompts the LLM answered with an empty threat list: {prompt hash: cached_at}
+    NEGATIVE_CACHE_TTL = 86400.0
+    _negative_cache: Dict[str, float] = {}
+    
+    # Token budget for the serialized DFD components in agent prompts
+    COMPONENTS_TOKEN_BUDGET = 1500
+    
     def __init__(self, name: str, focus_area: str):
         self.name = name
         self.focus_area = focus_area
         self.findings = []
+    
+    @classmethod
+    def invalidate_system_prompt_cache(cls) -> None:
+        """Drop cached system prompts (call after prompt templates change)."""
+        BaseAnalyzerAgent._system_prompt_cache.clear()
+    
+    async def _get_system_prompt(self, db_session=None, step_name: str = "threat_generation") -> str:
+        """Get the agent's system prompt, reusing a recently resolved one to skip the DB lookup."""
+        if db_session is None:
+            return self.fallback_prompt
+        
+        cache_key = (step_name, self.agent_type)
+        now = time.monotonic()
+        cached = self._system_prompt_cache.get(cache_key)
+        if cached and now - cached[0] < self.SYSTEM_PROMPT_CACHE_TTL:
+            return cached[1]
+        
+        system_prompt = await get_system_prompt_for_step(
+            step_name=step_name,
+            agent_type=self.agent_type,
+            fallback_prompt=self.fallback_prompt,
+            db_session=db_session
+        )
+        self._system_prompt_cache[cache_key] = (now, system_prompt)
+        return system_prompt
+    
+    @staticmethod
+    def _mark_incomplete() -> None:
+        """Flag the current agent run as partial so the orchestrator does not cache its findings."""
+        AGENT_RESULT_INCOMPLETE.set(True)
+    
+    def _record_output_tokens(self, output_tokens: int) -> None:
+        """Record the output length of a successfully parsed LLM response."""
+        history = self._output_token_history.get(self.agent_type)
+        if history is None:
+            history = deque(maxlen=self.OUTPUT_HISTORY_WINDOW)
+            self._output_token_history[self.agent_type] = history
+        history.append(output_tokens)
+    
+    def _adaptive_max_tokens(self) -> int:
+        """Get max_tokens for the next call: p95 of observed output plus headroom, within bounds."""
+        history = self._output_token_history.get(self.agent_type)
+        if not history or len(history) < self.OUTPUT_HISTORY_MIN_SAMPLES:
+            return self.DEFAULT_MAX_TOKENS
+        
+        ordered = sorted(history)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.MIN_MAX_TOKENS, min(self.DEFAULT_MAX_TOKENS, int(p95 * self.MAX_TOKENS_HEADROOM)))
         
     @abstractmethod
     async def analyze(
@@ -38,6 +203,257 @@ class BaseAnalyzerAgent(ABC):
         """Analyze the system from this agent's perspective."""
         pass
     
+    async def _passes_triage(self, document_text: str, components_summary: str) -> bool:
+        """
+        Screen the document with the cheap triage model before the full analysis.
+        Returns True (escalate) when triage is disabled, has no real provider configured,
+        fails, or gives no usable score.
+        """
+        if not settings.agent_triage_enabled:
+            return True
+        
+        triage_prompt = f"""You are screening system documentation for a security review.
+Rate from 0 to 100 how likely it is that this system has significant risks in the area of: {self.focus_area}.
+Reply with the number only.
+
+SYSTEM DOCUMENTATION:
+{TokenCounter.truncate_to_tokens(document_text, 2000)}
+
+COMPONENTS IDENTIFIED:
+{components_summary}"""
+        
+        try:
+            triage_provider = await get_llm_provider("threat_triage")
+            if isinstance(triage_provider, MockLLMProvider):
+                # Never filter agents on a mock score
+                logger.warning("⚠️ %s triage skipped: no triage LLM provider configured", self.name)
+                return True
+            response = await triage_provider.generate(triage_prompt, temperature=0.0, max_tokens=8)
+        except Exception as e:
+            logger.warning("⚠️ %s triage failed, running full analysis: %s", self.name, e)
+            return True
+        
+        match = re.search(r'\d+', response.content)
+        if not match:
+            return True
+        
+        score = int(match.group())
+        logger.info("🔎 %s triage score: %d (threshold %d)", self.name, score, settings.agent_triage_threshold)
+        return score >= settings.agent_triage_threshold
+    
+    @staticmethod
+    def _shared_context(document_text: str, components_summary: str) -> str:
+        """Build the prompt prefix shared by all agents for the same document."""
+        return f"""{SHARED_CONTEXT_PREAMBLE}
+
+SYSTEM DOCUMENTATION:
+{document_text}
+
+SYSTEM COMPONENTS:
+{components_summary}"""
+    
+    def _prompt_cache_key(self, prompt: str, llm_provider) -> str:
+        """Content-address a prompt and the model answering it for the response cache."""
+        model_id = f"{type(llm_provider).__name__}/{getattr(llm_provider, 'model', '')}"
+        return hashlib.sha256(f"{self.agent_type}\0{model_id}\0{prompt}".encode('utf-8')).hexdigest()
+    
+    def _get_cached_threats(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Get a copy of the threats previously parsed for an identical prompt."""
+        cached_at = self._negative_cache.get(cache_key)
+        if cached_at is not None:
+            if time.monotonic() - cached_at < self.NEGATIVE_CACHE_TTL:
+                return []
+            del self._negative_cache[cache_key]
+        
+        threats = self._response_cache.get(cache_key)
+        if threats is None:
+            return None
+        self._response_cache.move_to_end(cache_key)
+        return _copy_findings(threats)
+    
+    def _cache_threats(self, cache_key: str, threats: List[Dict[str, Any]]) -> None:
+        """Store parsed threats for a prompt, evicting the least recently used entries."""
+        self._response_cache[cache_key] = _copy_findings(threats)
+        self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _cache_no_threats(self, cache_key: str, llm_content: str) -> None:
+        """
+        Remember that the LLM found no threats for a prompt (e.g. boilerplate documents).
+        Only an explicit empty JSON array counts, so unparseable responses are retried.
+        """
+        start = llm_content.find('[')
+        if start == -1 or llm_content[start + 1:].lstrip()[:1] != ']':
+            return
+        now = time.monotonic()
+        if len(self._negative_cache) >= self.RESPONSE_CACHE_SIZE * 8:
+            # Purge expired entries before growing further
+            for key in [k for k, cached_at in self._negative_cache.items() if now - cached_at >= self.NEGATIVE_CACHE_TTL]:
+                del self._negative_cache[key]
+        self._negative_cache[cache_key] = now
+    
+    def _encode_components(self, dfd_components: Dict[str, Any], max_tokens: Optional[int] = None) -> str:
+        """
+        Serialize DFD components as compact JSON within a token budget.
+        Whole entries are dropped tail-first from the largest section, so the output stays valid JSON.
+        """
+        budget_chars = (max_tokens or self.COMPONENTS_TOKEN_BUDGET) * TokenCounter.CHARS_PER_TOKEN
+        sections = {
+            key: list(dfd_components[key])
+            for key in COMPONENT_SECTIONS
+            if isinstance(dfd_components.get(key), list) and dfd_components[key]
+        }
+        if not sections:
+            return "No components identified"
+        
+        # Size each entry once, then trim against the running total
+        sizes = {
+            key: [len(json.dumps(item, separators=(',', ':'), default=str)) + 1 for item in items]
+            for key, items in sections.items()
+        }
+        total = sum(len(key) + 4 for key in sections) + sum(sum(item_sizes) for item_sizes in sizes.values())
+        while total > budget_chars:
+            largest = max(sections, key=lambda key: len(sections[key]))
+            if len(sections[largest]) <= 1:
+                break
+            sections[largest].pop()
+            total -= sizes[largest].pop()
+        
+        return json.dumps(sections, separators=(',', ':'), sort_keys=True, default=str)
+    
+    @staticmethod
+    def _summarize_components(dfd_components: Dict[str, Any]) -> str:
+        """Short names-only components summary for the triage model (a fraction of the full JSON)."""
+        summary = []
+        for key, label, limit in COMPONENT_SUMMARY_SECTIONS:
+            items = dfd_components.get(key)
+            if items:
+                names = [item if isinstance(item, str) else str(item.get('name', 'Unknown')) for item in items[:limit]]
+                summary.append(f"{label}: {', '.join(names)}")
+        if dfd_components.get('data_flows'):
+            summary.append(f"Data Flows: {len(dfd_components['data_flows'])} connections")
+        
+        return '\n'.join(summary) if summary else "No components identified"
+    
+    def _parse_llm_threats(self, llm_content: str) -> List[Dict[str, Any]]:
+        """Parse LLM response into structured threats."""
+        try:
+            # Locate the outermost JSON array/object directly instead of stripping fences
+            content = llm_content.strip()
+            start = content.find('[')
+            end = content.rfind(']')
+            if start == -1 or end < start:
+                start = content.find('{')
+                end = content.rfind('}')
+            if start != -1 and end > start:
+                content = content[start:end + 1]
+            
+            # Parse JSON
+            threats = json.loads(content)
+            
+            if not isinstance(threats, list):
+                logger.warning("LLM returned non-list response, wrapping in list")
+                threats = [threats]
+                
+            return self._normalize_threats(threats)
+            
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse LLM response as JSON: %s", e)
+            logger.error("LLM content: %.500s...", llm_content)
+            return []
+        except Exception as e:
+            logger.error("Error processing LLM threats: %s", e)
+            return []
+    
+    def _normalize_threats(self, threats: List[Any]) -> List[Dict[str, Any]]:
+        """Keep valid threats and fill required fields (dict merge keeps LLM-provided values)."""
+        defaults = {**self.threat_defaults, 'agent_source': self.name}
+        return [
+            {**defaults, **threat}
+            for threat in threats
+            if isinstance(threat, dict) and 'threat_name' in threat
+        ]
+    
+    async def _generate_threats_streaming(
+        self,
+        llm_provider,
+        prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[str, List[Dict[str, Any]], bool]:
+        """
+        Stream the LLM response and parse each threat as soon as its JSON object is complete.
+        The response counts as complete only if the JSON array was closed and the provider
+        did not stop at max_tokens; otherwise the threats parsed so far are returned as partial.
+        
+        Returns:
+            Tuple of (response content received, parsed threats, whether the response is complete)
+        """
+        decoder = json.JSONDecoder()
+        content = ""
+        position = -1  # Parse position inside the JSON array, -1 until '[' is seen
+        array_closed = False
+        raw_threats: List[Any] = []
+        stream_metadata: Dict[str, Any] = {}
+        
+        try:
+            async for chunk in llm_provider.stream_generate(
+                prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream_metadata=stream_metadata
+            ):
+                content += chunk
+                if position == -1:
+                    array_start = content.find('[')
+                    if array_start == -1:
+                        continue
+                    position = array_start + 1
+                position, array_closed = self._decode_array_items(decoder, content, position, raw_threats)
+        except Exception as e:
+            if not raw_threats:
+                raise
+            logger.warning("LLM stream interrupted after %d threats: %s", len(raw_threats), e)
+            return content, self._normalize_threats(raw_threats), False
+        
+        truncated = stream_metadata.get("finish_reason") == "length"
+        if truncated:
+            logger.warning("LLM response hit max_tokens (%d) after %d threats", max_tokens, len(raw_threats))
+        
+        if not raw_threats:
+            # Not a JSON array of objects (e.g. a single object) - parse the full response
+            loop = asyncio.get_running_loop()
+            return content, await loop.run_in_executor(PARSE_POOL, self._parse_llm_threats, content), not truncated
+        
+        return content, self._normalize_threats(raw_threats), array_closed and not truncated
+    
+    @staticmethod
+    def _decode_array_items(
+        decoder: json.JSONDecoder,
+        buffer: str,
+        position: int,
+        items: List[Any]
+    ) -> Tuple[int, bool]:
+        """
+        Decode every complete array element after position.
+        Returns where parsing stopped and whether it stopped on the array's closing ']'.
+        """
+        length = len(buffer)
+        while True:
+            while position < length and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= length:
+                return position, False
+            if buffer[position] == ']':
+                return position, True
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Element still incomplete - wait for more of the stream
+                return position, False
+            items.append(item)
+    
     def _extract_context(self, text: str, keyword: str, window: int = 100) -> str:
         """Extract context around a keyword."""
         text_lower = text.lower()
@@ -59,6 +475,11 @@ class ArchitecturalRiskAgent(BaseAnalyzerAgent):
     Mission: Detect systemic, foundational flaws often missed by traditional scanners.
     """
     
+    agent_type = "architectural_risk"
+    findings_key = "architectural_risks"
+    fallback_prompt = "You are an expert Enterprise Architect and Security Professional specializing in identifying systemic architectural vulnerabilities that traditional security scans miss."
+    threat_defaults = {'component_name': 'System Architecture', 'component_type': 'architecture', 'stride_category': 'T'}
+    
     def __init__(self):
         super().__init__(
             name="Architectural Risk Agent",
@@ -129,26 +550,17 @@ class ArchitecturalRiskAgent(BaseAnalyzerAgent):
             llm_provider = await get_llm_provider("threat_generation")
             
             # Prepare components summary
-            components_summary = self._prepare_components_summary(dfd_components)
+            components_summary = self._encode_components(dfd_components)
             existing_threats_summary = self._prepare_existing_threats_summary(existing_threats)
             
             # Get custom system prompt (with fallback)
-            fallback_prompt = "You are an expert Enterprise Architect and Security Professional specializing in identifying systemic architectural vulnerabilities that traditional security scans miss."
-            system_prompt = await get_system_prompt_for_step(
-                step_name="threat_generation",
-                agent_type="architectural_risk",
-                fallback_prompt=fallback_prompt,
-                db_session=db_session
-            )
+            system_prompt = await self._get_system_prompt(db_session)
             
             # Create architectural analysis prompt
-            architectural_prompt = f"""{system_prompt}
+            architectural_prompt = f"""{self._shared_context(document_text, components_summary)}
 
-SYSTEM DOCUMENTATION:
-{document_text}  
-
-COMPONENTS IDENTIFIED:
-{components_summary}
+YOUR ROLE:
+{system_prompt}
 
 EXISTING TECHNICAL THREATS:
 {existing_threats_summary}
@@ -185,106 +597,69 @@ OUTPUT FORMAT (JSON array):
 
 Generate 3-7 HIGH-QUALITY architectural threats. Focus on systemic risks that could enable multiple attack paths or cause cascading failures."""
 
+            # Reuse threats from an identical earlier prompt (e.g. re-uploaded document)
+            cache_key = self._prompt_cache_key(architectural_prompt, llm_provider)
+            cached_threats = self._get_cached_threats(cache_key)
+            if cached_threats is not None:
+                logger.info("🏗️ Architectural Risk Agent reused %d cached threats", len(cached_threats))
+                return cached_threats
+            
             # Generate LLM analysis
+            # Skip the expensive model when the triage model finds nothing in this agent's area
+            if not await self._passes_triage(document_text, self._summarize_components(dfd_components)):
+                logger.info("⏭️ %s skipped: triage found no relevant risks", self.name)
+                return []
+            
             logger.info("🔮 Calling LLM for architectural analysis...")
-            llm_response = await llm_provider.generate(
+            llm_content, threats, complete = await self._generate_threats_streaming(
+                llm_provider,
                 architectural_prompt,
                 temperature=0.3,  # Lower temperature for more focused analysis
-                max_tokens=2000
+                max_tokens=self._adaptive_max_tokens()
             )
             
             # Track token usage
             model_name = getattr(llm_provider, 'model', 'unknown')
             token_usage = TokenCounter.track_llm_usage(
                 prompt=architectural_prompt,
-                response=llm_response.content,
+                response=llm_content,
                 model=model_name
             )
-            logger.info(f"🏗️ Architectural analysis: {token_usage['total_tokens']} tokens, ${token_usage['total_cost_usd']:.4f}")
+            logger.info("🏗️ Architectural analysis: %d tokens, $%.4f", token_usage['total_tokens'], token_usage['total_cost_usd'])
             
-            # Parse LLM response
-            threats = self._parse_llm_threats(llm_response.content)
+            if not complete:
+                # Truncated response: use it for this run, but don't cache or learn from it
+                self._mark_incomplete()
+            elif threats:
+                self._record_output_tokens(token_usage['output_tokens'])
+                self._cache_threats(cache_key, threats)
+            else:
+                self._cache_no_threats(cache_key, llm_content)
             
             # Add token usage metadata to each threat
             for threat in threats:
                 threat['token_usage'] = token_usage
             
-            logger.info(f"🏗️ Architectural Risk Agent generated {len(threats)} LLM-powered threats")
+            logger.info("🏗️ Architectural Risk Agent generated %d LLM-powered threats", len(threats))
             return threats
             
         except Exception as e:
-            logger.error(f"❌ Architectural Risk Agent LLM analysis failed: {e}")
+            logger.error("❌ Architectural Risk Agent LLM analysis failed: %s", e)
             # Fallback to simplified rule-based analysis
+            self._mark_incomplete()
             return self._fallback_analysis(dfd_components)
     
-    def _prepare_components_summary(self, dfd_components: Dict[str, Any]) -> str:
-        """Prepare a concise components summary for the LLM."""
-        summary = []
-        
-        if 'external_entities' in dfd_components:
-            summary.append(f"External Entities: {', '.join(dfd_components['external_entities'][:5])}")
-        if 'processes' in dfd_components:
-            processes = dfd_components['processes'][:8]  # Limit for token efficiency
-            process_names = [p if isinstance(p, str) else p.get('name', 'Unknown') for p in processes]
-            summary.append(f"Processes: {', '.join(process_names)}")
-        if 'assets' in dfd_components:
-            summary.append(f"Data Assets: {', '.join(dfd_components['assets'][:5])}")
-        if 'data_flows' in dfd_components:
-            summary.append(f"Data Flows: {len(dfd_components['data_flows'])} connections")
-            
-        return '\n'.join(summary)
-    
     def _prepare_existing_threats_summary(self, existing_threats: List[Dict[str, Any]]) -> str:
         """Prepare summary of existing threats to avoid duplication."""
         if not existing_threats:
             return "No existing threats provided"
             
-        threat_categories = {}
+        threat_categories = defaultdict(int)
         for threat in existing_threats[:10]:  # Limit for efficiency
-            category = threat.get('stride_category', 'Unknown')
-            threat_categories[category] = threat_categories.get(category, 0) + 1
+            threat_categories[threat.get('stride_category', 'Unknown')] += 1
             
         return f"Existing threats by STRIDE: {', '.join([f'{k}:{v}' for k,v in threat_categories.items()])}"
     
-    def _parse_llm_threats(self, llm_content: str) -> List[Dict[str, Any]]:
-        """Parse LLM response into structured threats."""
-        try:
-            # Clean up the response
-            content = llm_content.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            # Parse JSON
-            threats = json.loads(content)
-            
-            if not isinstance(threats, list):
-                logger.warning("LLM returned non-list response, wrapping in list")
-                threats = [threats]
-                
-            # Validate and clean threats
-            valid_threats = []
-            for threat in threats:
-                if isinstance(threat, dict) and 'threat_name' in threat:
-                    # Ensure required fields
-                    threat.setdefault('component_name', 'System Architecture')
-                    threat.setdefault('component_type', 'architecture')
-                    threat.setdefault('agent_source', 'Architectural Risk Agent')
-                    threat.setdefault('stride_category', 'T')
-                    valid_threats.append(threat)
-            
-            return valid_threats
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"LLM content: {llm_content[:500]}...")
-            return []
-        except Exception as e:
-            logger.error(f"Error processing LLM threats: {e}")
-            return []
-    
     def _fallback_analysis(self, dfd_components: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Simple fallback if LLM fails."""
         logger.info("🔄 Using fallback rule-based analysis")
@@ -486,6 +861,11 @@ class BusinessFinancialRiskAgent(BaseAnalyzerAgent):
     Mission: Connect technical threats to tangible business impact.
     """
     
+    agent_type = "business_financial"
+    findings_key = "business_risks"
+    fallback_prompt = "You are a Chief Risk Officer and Business Continuity Expert with deep expertise in quantifying cybersecurity threats' impact on business operations and financial performance."
+    threat_defaults = {'component_name': 'Business Operations', 'component_type': 'business', 'stride_category': 'D'}
+    
     def __init__(self):
         super().__init__(
             name="Business & Financial Risk Agent",
@@ -528,26 +908,17 @@ class BusinessFinancialRiskAgent(BaseAnalyzerAgent):
             llm_provider = await get_llm_provider("threat_generation")
             
             # Prepare business context summary
-            components_summary = self._prepare_components_summary(dfd_components)
+            components_summary = self._encode_components(dfd_components)
             existing_threats_summary = self._prepare_existing_threats_summary(existing_threats)
             
             # Get custom system prompt (with fallback)
-            fallback_prompt = "You are a Chief Risk Officer and Business Continuity Expert with deep expertise in quantifying cybersecurity threats' impact on business operations and financial performance."
-            system_prompt = await get_system_prompt_for_step(
-                step_name="threat_generation",
-                agent_type="business_financial",
-                fallback_prompt=fallback_prompt,
-                db_session=db_session
-            )
+            system_prompt = await self._get_system_prompt(db_session)
             
             # Create business risk analysis prompt
-            business_prompt = f"""{system_prompt}
-
-SYSTEM DOCUMENTATION:
-{document_text}
+            business_prompt = f"""{self._shared_context(document_text, components_summary)}
 
-SYSTEM COMPONENTS:
-{components_summary}
+YOUR ROLE:
+{system_prompt}
 
 EXISTING TECHNICAL THREATS:
 {existing_threats_summary}
@@ -587,53 +958,58 @@ OUTPUT FORMAT (JSON array):
 
 Generate 2-5 HIGH-IMPACT business risks. Focus on threats that would cause significant financial loss, operational disruption, or competitive damage."""
 
+            # Reuse threats from an identical earlier prompt (e.g. re-uploaded document)
+            cache_key = self._prompt_cache_key(business_prompt, llm_provider)
+            cached_threats = self._get_cached_threats(cache_key)
+            if cached_threats is not None:
+                logger.info("💼 Business & Financial Risk Agent reused %d cached threats", len(cached_threats))
+                return cached_threats
+            
             # Generate LLM analysis
+            # Skip the expensive model when the triage model finds nothing in this agent's area
+            if not await self._passes_triage(document_text, self._summarize_components(dfd_components)):
+                logger.info("⏭️ %s skipped: triage found no relevant risks", self.name)
+                return []
+            
             logger.info("🔮 Calling LLM for business impact analysis...")
-            llm_response = await llm_provider.generate(
+            llm_content, threats, complete = await self._generate_threats_streaming(
+                llm_provider,
                 business_prompt,
                 temperature=0.4,  # Slightly higher for creative business impact scenarios
-                max_tokens=2000
+                max_tokens=self._adaptive_max_tokens()
             )
             
             # Track token usage
             model_name = getattr(llm_provider, 'model', 'unknown')
             token_usage = TokenCounter.track_llm_usage(
                 prompt=business_prompt,
-                response=llm_response.content,
+                response=llm_content,
                 model=model_name
             )
-            logger.info(f"💼 Business analysis: {token_usage['total_tokens']} tokens, ${token_usage['total_cost_usd']:.4f}")
+            logger.info("💼 Business analysis: %d tokens, $%.4f", token_usage['total_tokens'], token_usage['total_cost_usd'])
             
-            # Parse LLM response
-            threats = self._parse_llm_threats(llm_response.content)
+            if not complete:
+                # Truncated response: use it for this run, but don't cache or learn from it
+                self._mark_incomplete()
+            elif threats:
+                self._record_output_tokens(token_usage['output_tokens'])
+                self._cache_threats(cache_key, threats)
+            else:
+                self._cache_no_threats(cache_key, llm_content)
             
             # Add token usage metadata to each threat
             for threat in threats:
                 threat['token_usage'] = token_usage
             
-            logger.info(f"💼 Business & Financial Risk Agent generated {len(threats)} LLM-powered threats")
+            logger.info("💼 Business & Financial Risk Agent generated %d LLM-powered threats", len(threats))
             return threats
             
         except Exception as e:
-            logger.error(f"❌ Business & Financial Risk Agent LLM analysis failed: {e}")
+            logger.error("❌ Business & Financial Risk Agent LLM analysis failed: %s", e)
             # Fallback to simplified analysis
+            self._mark_incomplete()
             return self._fallback_business_analysis(dfd_components)
     
-    def _prepare_components_summary(self, dfd_components: Dict[str, Any]) -> str:
-        """Prepare a summary of DFD components for business analysis."""
-        summary = []
-        
-        if dfd_components.get('processes'):
-            summary.append(f"Processes: {', '.join(dfd_components['processes'])}")
-        if dfd_components.get('assets'):
-            summary.append(f"Assets: {', '.join(dfd_components['assets'])}")
-        if dfd_components.get('external_entities'):
-            summary.append(f"External Entities: {', '.join(dfd_components['external_entities'])}")
-        if dfd_components.get('trust_boundaries'):
-            summary.append(f"Trust Boundaries: {', '.join(dfd_components['trust_boundaries'])}")
-            
-        return "; ".join(summary) if summary else "No components identified"
-    
     def _prepare_existing_threats_summary(self, existing_threats: List[Dict[str, Any]]) -> str:
         """Prepare a summary of existing threats."""
         if not existing_threats:
@@ -696,12 +1072,15 @@ Generate 2-5 HIGH-IMPACT business risks. Focus on threats that would cause signi
             'requirements': []
         }
         
+        # Lowercase the document once for all pattern and keyword scans
+        document_lower = document_text.lower()
+        
         # Extract SLA requirements
         for metric_name, pattern in self.sla_patterns.items():
-            matches = re.findall(pattern, document_text.lower())
+            matches = re.findall(pattern, document_lower)
             if matches:
                 metrics['sla'][metric_name] = matches[0] if matches else None
-                logger.info(f"Business Agent found {metric_name}: {matches[0]}")
+                logger.info("Business Agent found %s: %s", metric_name, matches[0])
         
         # Extract cost implications
         cost_matches = re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d+)?)', document_text)
@@ -711,7 +1090,7 @@ Generate 2-5 HIGH-IMPACT business risks. Focus on threats that would cause signi
         # Look for business requirements
         for impact_type, keywords in self.impact_indicators.items():
             for keyword in keywords:
-                if keyword in document_text.lower():
+                if keyword in document_lower:
                     metrics['requirements'].append(impact_type)
                     break
         
@@ -745,7 +1124,7 @@ Generate 2-5 HIGH-IMPACT business risks. Focus on threats that would cause signi
                 # Calculate potential business impact
                 impact = self._calculate_component_business_impact(process_name, business_metrics)
                 
-                if impact['severity'] in ['High', 'Critical']:
+                if impact['severity'] in HIGH_RISK_LEVELS:
                     findings.append({
                         'component': process_name,
                         'type': 'Business-Critical Component',
@@ -951,6 +1330,11 @@ class ComplianceGovernanceAgent(BaseAnalyzerAgent):
     Mission: View system through the lens of an auditor.
     """
     
+    agent_type = "compliance_governance"
+    findings_key = "compliance_risks"
+    fallback_prompt = "You are a Chief Compliance Officer and Regulatory Audit Expert with deep expertise in cybersecurity compliance frameworks (GDPR, PCI-DSS, HIPAA, SOX, ISO 27001) and governance standards."
+    threat_defaults = {'component_name': 'Governance & Compliance', 'component_type': 'compliance', 'stride_category': 'I'}
+    
     def __init__(self):
         super().__init__(
             name="Compliance & Governance Agent",
@@ -1036,26 +1420,17 @@ class ComplianceGovernanceAgent(BaseAnalyzerAgent):
             llm_provider = await get_llm_provider("threat_generation")
             
             # Prepare components and context
-            components_summary = self._prepare_components_summary(dfd_components)
+            components_summary = self._encode_components(dfd_components)
             existing_threats_summary = self._prepare_existing_threats_summary(existing_threats)
             
             # Get custom system prompt (with fallback)
-            fallback_prompt = "You are a Chief Compliance Officer and Regulatory Audit Expert with deep expertise in cybersecurity compliance frameworks (GDPR, PCI-DSS, HIPAA, SOX, ISO 27001) and governance standards."
-            system_prompt = await get_system_prompt_for_step(
-                step_name="threat_generation",
-                agent_type="compliance_governance",
-                fallback_prompt=fallback_prompt,
-                db_session=db_session
-            )
+            system_prompt = await self._get_system_prompt(db_session)
             
             # Create compliance analysis prompt
-            compliance_prompt = f"""{system_prompt}
+            compliance_prompt = f"""{self._shared_context(document_text, components_summary)}
 
-SYSTEM DOCUMENTATION:
-{document_text}
-
-SYSTEM COMPONENTS:
-{components_summary}
+YOUR ROLE:
+{system_prompt}
 
 EXISTING TECHNICAL THREATS:
 {existing_threats_summary}
@@ -1101,108 +1476,69 @@ OUTPUT FORMAT (JSON array):
 
 Generate 2-5 HIGH-PRIORITY compliance threats. Focus on violations that would trigger regulatory action or cause audit failures."""
 
+            # Reuse threats from an identical earlier prompt (e.g. re-uploaded document)
+            cache_key = self._prompt_cache_key(compliance_prompt, llm_provider)
+            cached_threats = self._get_cached_threats(cache_key)
+            if cached_threats is not None:
+                logger.info("⚖️ Compliance & Governance Agent reused %d cached threats", len(cached_threats))
+                return cached_threats
+            
             # Generate LLM analysis
+            # Skip the expensive model when the triage model finds nothing in this agent's area
+            if not await self._passes_triage(document_text, self._summarize_components(dfd_components)):
+                logger.info("⏭️ %s skipped: triage found no relevant risks", self.name)
+                return []
+            
             logger.info("🔮 Calling LLM for compliance analysis...")
-            llm_response = await llm_provider.generate(
+            llm_content, threats, complete = await self._generate_threats_streaming(
+                llm_provider,
                 compliance_prompt,
                 temperature=0.2,  # Lower temperature for more precise compliance analysis
-                max_tokens=2000
+                max_tokens=self._adaptive_max_tokens()
             )
             
             # Track token usage
             model_name = getattr(llm_provider, 'model', 'unknown')
             token_usage = TokenCounter.track_llm_usage(
                 prompt=compliance_prompt,
-                response=llm_response.content,
+                response=llm_content,
                 model=model_name
             )
-            logger.info(f"⚖️ Compliance analysis: {token_usage['total_tokens']} tokens, ${token_usage['total_cost_usd']:.4f}")
+            logger.info("⚖️ Compliance analysis: %d tokens, $%.4f", token_usage['total_tokens'], token_usage['total_cost_usd'])
             
-            # Parse LLM response
-            threats = self._parse_llm_threats(llm_response.content)
+            if not complete:
+                # Truncated response: use it for this run, but don't cache or learn from it
+                self._mark_incomplete()
+            elif threats:
+                self._record_output_tokens(token_usage['output_tokens'])
+                self._cache_threats(cache_key, threats)
+            else:
+                self._cache_no_threats(cache_key, llm_content)
             
             # Add token usage metadata to each threat
             for threat in threats:
                 threat['token_usage'] = token_usage
             
-            logger.info(f"⚖️ Compliance & Governance Agent generated {len(threats)} LLM-powered threats")
+            logger.info("⚖️ Compliance & Governance Agent generated %d LLM-powered threats", len(threats))
             return threats
             
         except Exception as e:
-            logger.error(f"❌ Compliance & Governance Agent LLM analysis failed: {e}")
+            logger.error("❌ Compliance & Governance Agent LLM analysis failed: %s", e)
             # Fallback to simplified rule-based analysis
+            self._mark_incomplete()
             return self._fallback_compliance_analysis(document_text, dfd_components)
     
-    def _prepare_components_summary(self, dfd_components: Dict[str, Any]) -> str:
-        """Prepare a concise components summary for the LLM."""
-        summary = []
-        
-        if 'external_entities' in dfd_components:
-            summary.append(f"External Entities: {', '.join(dfd_components['external_entities'][:5])}")
-        if 'processes' in dfd_components:
-            processes = dfd_components['processes'][:8]
-            process_names = [p if isinstance(p, str) else p.get('name', 'Unknown') for p in processes]
-            summary.append(f"Processes: {', '.join(process_names)}")
-        if 'data_stores' in dfd_components:
-            stores = dfd_components['data_stores'][:5]
-            store_names = [s if isinstance(s, str) else s.get('name', 'Unknown') for s in stores]
-            summary.append(f"Data Stores: {', '.join(store_names)}")
-        if 'data_flows' in dfd_components:
-            summary.append(f"Data Flows: {len(dfd_components['data_flows'])} connections")
-            
-        return '\n'.join(summary)
-    
     def _prepare_existing_threats_summary(self, existing_threats: List[Dict[str, Any]]) -> str:
         """Prepare summary of existing threats to avoid duplication."""
         if not existing_threats:
             return "No existing threats provided"
             
-        threat_categories = {}
+        threat_categories = defaultdict(int)
         for threat in existing_threats[:10]:  # Limit for efficiency
-            category = threat.get('stride_category', 'Unknown')
-            threat_categories[category] = threat_categories.get(category, 0) + 1
+            threat_categories[threat.get('stride_category', 'Unknown')] += 1
             
         return f"Existing threats by STRIDE: {', '.join([f'{k}:{v}' for k,v in threat_categories.items()])}"
     
-    def _parse_llm_threats(self, llm_content: str) -> List[Dict[str, Any]]:
-        """Parse LLM response into structured threats."""
-        try:
-            # Clean up the response
-            content = llm_content.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-            
-            # Parse JSON
-            threats = json.loads(content)
-            
-            if not isinstance(threats, list):
-                logger.warning("LLM returned non-list response, wrapping in list")
-                threats = [threats]
-                
-            # Validate and clean threats
-            valid_threats = []
-            for threat in threats:
-                if isinstance(threat, dict) and 'threat_name' in threat:
-                    # Ensure required fields
-                    threat.setdefault('component_name', 'Governance & Compliance')
-                    threat.setdefault('component_type', 'compliance')
-                    threat.setdefault('agent_source', 'Compliance & Governance Agent')
-                    threat.setdefault('stride_category', 'I')
-                    valid_threats.append(threat)
-            
-            return valid_threats
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"LLM content: {llm_content[:500]}...")
-            return []
-        except Exception as e:
-            logger.error(f"Error processing LLM threats: {e}")
-            return []
-    
     def _fallback_compliance_analysis(self, document_text: str, dfd_components: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Simple fallback if LLM fails."""
         logger.info("🔄 Using fallback rule-based compliance analysis")
@@ -1233,7 +1569,7 @@ Generate 2-5 HIGH-PRIORITY compliance threats. Focus on violations that would tr
             for keyword in info['keywords']:
                 if keyword in document_lower:
                     applicable.append(framework)
-                    logger.info(f"Compliance Agent identified {framework.upper()} requirements")
+                    logger.info("Compliance Agent identified %s requirements", framework.upper())
                     break
         
         return applicable
@@ -1263,7 +1599,7 @@ Generate 2-5 HIGH-PRIORITY compliance threats. Focus on violations that would tr
             if missing_requirements:
                 findings.append({
                     'type': f'{framework.upper()} Compliance Gap',
-                    'severity': 'High' if framework in ['pci_dss', 'hipaa'] else 'Medium',
+                    'severity': 'High' if framework in HIGH_SEVERITY_FRAMEWORKS else 'Medium',
                     'finding': f'Missing {len(missing_requirements)} {framework.upper()} requirements',
                     'missing_requirements': missing_requirements[:3],  # Top 3
                     'recommendation': f'Implement missing {framework.upper()} controls to achieve compliance'
@@ -1443,13 +1779,69 @@ class MultiAgentOrchestrator:
     Orchestrates multiple analyzer agents to provide comprehensive threat analysis.
     """
     
+    # Consolidated findings for recently analyzed inputs: {input fingerprint: (cached_at, findings)}.
+    # The TTL bounds staleness in processes (Celery workers, other API workers) that never see
+    # invalidate_caches() after a prompt, feedback or model change.
+    RESULT_CACHE_SIZE = 128
+    RESULT_CACHE_TTL = 300.0
+    _result_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    # Analyses currently running, keyed like the result cache
+    _inflight: Dict[bytes, "asyncio.Task[Dict[str, Any]]"] = {}
+    
+    AGENT_CLASSES = (ArchitecturalRiskAgent, BusinessFinancialRiskAgent, ComplianceGovernanceAgent)
+    
+    # Agents hold no per-run state, so every orchestrator (one per pipeline run) shares one set
+    _shared_agents: Optional[Tuple[BaseAnalyzerAgent, ...]] = None
+    
     def __init__(self):
-        self.agents = [
-            ArchitecturalRiskAgent(),
-            BusinessFinancialRiskAgent(),
-            ComplianceGovernanceAgent()
-        ]
-        logger.info(f"Multi-Agent Orchestrator initialized with {len(self.agents)} agents")
+        logger.info("Multi-Agent Orchestrator initialized with %d agents", len(self.AGENT_CLASSES))
+    
+    @property
+    def agents(self) -> Tuple[BaseAnalyzerAgent, ...]:
+        """The shared agent instances, built on first use (runs without document text never need them)."""
+        if MultiAgentOrchestrator._shared_agents is None:
+            MultiAgentOrchestrator._shared_agents = tuple(agent_class() for agent_class in self.AGENT_CLASSES)
+        return MultiAgentOrchestrator._shared_agents
+    
+    @classmethod
+    def invalidate_caches(cls) -> None:
+        """Drop cached agent prompts and results (call after prompt templates change)."""
+        BaseAnalyzerAgent.invalidate_system_prompt_cache()
+        cls._result_cache.clear()
+    
+    @staticmethod
+    def _llm_config_fingerprint() -> Dict[str, Any]:
+        """The provider settings that shape agent output: generation model and triage gate."""
+        config: Dict[str, Any] = {
+            "triage": (settings.agent_triage_enabled, settings.agent_triage_threshold)
+        }
+        for step in ("threat_generation", "threat_triage"):
+            prefix = STEP_CONFIG_PREFIXES[step]
+            provider_type = getattr(settings, f"{prefix}_llm_provider", "")
+            config[step] = (provider_type, getattr(settings, f"{prefix}_{provider_type.lower()}_model", None))
+        return config
+    
+    @classmethod
+    def _result_cache_key(
+        cls,
+        document_text: str,
+        dfd_components: Dict[str, Any],
+        existing_threats: List[Dict[str, Any]],
+        system_prompts: List[str]
+    ) -> bytes:
+        """Fingerprint the analysis input, resolved agent prompts and LLM configuration for the result cache."""
+        payload = json.dumps(
+            {
+                "d": document_text,
+                "c": dfd_components,
+                "t": existing_threats,
+                "p": system_prompts,
+                "l": cls._llm_config_fingerprint()
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
     
     async def analyze_system(
         self,
@@ -1472,6 +1864,45 @@ class MultiAgentOrchestrator:
         if existing_threats is None:
             existing_threats = []
         
+        # Resolved system prompts carry custom templates and few-shot feedback, so they are part of
+        # the key. Resolved one at a time: the agents share db_session, which is not concurrency-safe.
+        system_prompts = [await agent._get_system_prompt(db_session) for agent in self.agents]
+        
+        # Re-running the same analysis (e.g. user re-triggers the pipeline) skips the agent fan-out
+        cache_key = self._result_cache_key(document_text, dfd_components, existing_threats, system_prompts)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            cached_at, cached_findings = cached
+            if time.monotonic() - cached_at < self.RESULT_CACHE_TTL:
+                self._result_cache.move_to_end(cache_key)
+                logger.info("♻️ Reusing multi-agent findings for identical input")
+                return _copy_findings(cached_findings)
+            del self._result_cache[cache_key]
+        
+        # Join an identical analysis that is already running instead of starting another fan-out.
+        # shield() keeps the shared run alive if one of its waiters is cancelled.
+        loop = asyncio.get_running_loop()
+        analysis = self._inflight.get(cache_key)
+        if analysis is not None and analysis.get_loop() is loop:
+            logger.info("♻️ Joining in-flight multi-agent analysis for identical input")
+        else:
+            analysis = loop.create_task(
+                self._run_analysis(cache_key, document_text, dfd_components, existing_threats, db_session)
+            )
+            self._inflight[cache_key] = analysis
+            analysis.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        return _copy_findings(await asyncio.shield(analysis))
+    
+    async def _run_analysis(
+        self,
+        cache_key: bytes,
+        document_text: str,
+        dfd_components: Dict[str, Any],
+        existing_threats: List[Dict[str, Any]],
+        db_session
+    ) -> Dict[str, Any]:
+        """Run all agents concurrently and consolidate their findings."""
         all_findings = {
             'architectural_risks': [],
             'business_risks': [],
@@ -1481,51 +1912,53 @@ class MultiAgentOrchestrator:
         }
         
         # Run all agents concurrently for faster execution
-        import asyncio
-        
         logger.info("🤖 === V3 MULTI-AGENT ORCHESTRATOR STARTING ===")
-        logger.info(f"🚀 Running {len(self.agents)} specialized agents concurrently...")
+        logger.info("🚀 Running %d specialized agents concurrently...", len(self.agents))
         logger.info("🎯 Agents: Architectural Risk + Business Financial + Compliance Governance")
-        start_time = asyncio.get_event_loop().time()
+        start_time = time.monotonic()
         
         # Create concurrent tasks for all agents
-        agent_tasks = []
-        for agent in self.agents:
-            task = agent.analyze(document_text, dfd_components, existing_threats, db_session)
-            agent_tasks.append((agent, task))
+        agent_tasks = [
+            self._run_agent(agent, document_text, dfd_components, existing_threats, db_session)
+            for agent in self.agents
+        ]
         
         # Execute all agents concurrently
+        agents_failed = 0
+        agents_incomplete = 0
         try:
-            results = await asyncio.gather(*[task for agent, task in agent_tasks], return_exceptions=True)
-            
-            # Process results and categorize findings
-            for (agent, _), result in zip(agent_tasks, results):
+            # Process each agent's findings as soon as it finishes instead of waiting for the slowest
+            for next_finished in asyncio.as_completed(agent_tasks):
+                agent, result, complete = await next_finished
                 if isinstance(result, Exception):
-                    logger.error(f"{agent.name} failed: {result}")
+                    logger.error("%s failed: %s", agent.name, result)
+                    agents_failed += 1
                     continue
+                if not complete:
+                    agents_incomplete += 1
                 
                 agent_threats = result
-                logger.info(f"✅ {agent.name} completed successfully - Found {len(agent_threats)} threats")
+                logger.info("✅ %s completed successfully - Found %d threats", agent.name, len(agent_threats))
                 
                 # Categorize findings
-                if isinstance(agent, ArchitecturalRiskAgent):
-                    all_findings['architectural_risks'] = agent_threats
-                elif isinstance(agent, BusinessFinancialRiskAgent):
-                    all_findings['business_risks'] = agent_threats
-                elif isinstance(agent, ComplianceGovernanceAgent):
-                    all_findings['compliance_risks'] = agent_threats
+                all_findings[agent.findings_key] = agent_threats
                 
-                all_findings['consolidated_threats'].extend(agent_threats)
-                
-            execution_time = asyncio.get_event_loop().time() - start_time
-            logger.info(f"🎉 === V3 MULTI-AGENT ANALYSIS COMPLETE ===")
-            logger.info(f"⚡ All {len(self.agents)} agents completed in {execution_time:.1f}s (concurrent execution)")
-            logger.info(f"📊 Total consolidated threats: {len(all_findings['consolidated_threats'])}")
+            execution_time = time.monotonic() - start_time
+            logger.info("🎉 === V3 MULTI-AGENT ANALYSIS COMPLETE ===")
+            logger.info("⚡ All %d agents completed in %.1fs (concurrent execution)", len(self.agents), execution_time)
+            logger.info("📊 Total consolidated threats: %d", sum(len(all_findings[agent.findings_key]) for agent in self.agents))
                 
         except Exception as e:
-            logger.error(f"Critical error in multi-agent execution: {e}")
+            logger.error("Critical error in multi-agent execution: %s", e)
+            agents_failed = len(self.agents)
+            execution_time = time.monotonic() - start_time
             # Continue with partial results if some agents succeeded
         
+        # Consolidate in agent order, independent of which agent finished first
+        all_findings['consolidated_threats'] = list(
+            chain.from_iterable(all_findings[agent.findings_key] for agent in self.agents)
+        )
+        
         # Generate summary statistics
         all_findings['summary'] = {
             'total_threats': len(all_findings['consolidated_threats']),
@@ -1533,6 +1966,7 @@ class MultiAgentOrchestrator:
             'business_risks': len(all_findings['business_risks']),
             'compliance_risks': len(all_findings['compliance_risks']),
             'agents_executed': len(self.agents),
+            'execution_time_seconds': round(execution_time, 2),
             'analysis_timestamp': datetime.utcnow().isoformat()
         }
         
@@ -1541,16 +1975,36 @@ class MultiAgentOrchestrator:
             all_findings['consolidated_threats']
         )
         
+        # Only cache complete results so failed or partial agents are retried next time
+        if not agents_failed and not agents_incomplete:
+            self._result_cache[cache_key] = (time.monotonic(), _copy_findings(all_findings))
+            while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+        
         return all_findings
     
+    @staticmethod
+    async def _run_agent(
+        agent: BaseAnalyzerAgent,
+        document_text: str,
+        dfd_components: Dict[str, Any],
+        existing_threats: List[Dict[str, Any]],
+        db_session
+    ) -> Tuple[BaseAnalyzerAgent, Any, bool]:
+        """Run one agent, returning (agent, threats or the exception it raised, whether the result is complete)."""
+        AGENT_RESULT_INCOMPLETE.set(False)
+        try:
+            threats = await agent.analyze(document_text, dfd_components, existing_threats, db_session)
+        except Exception as e:
+            return agent, e, False
+        return agent, threats, not AGENT_RESULT_INCOMPLETE.get()
+    
     def _prioritize_threats(self, threats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Prioritize threats based on severity and type."""
-        severity_order = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
-        
-        # Sort by severity and agent type
+        # Sort by severity and agent type (agents emit potential_impact; legacy threats use 'Potential Impact')
         threats.sort(
             key=lambda t: (
-                severity_order.get(t.get('Potential Impact', 'Medium'), 2),
+                SEVERITY_ORDER.get(t.get('potential_impact') or t.get('Potential Impact'), 2),
                 t.get('agent_source', '')
             ),
             reverse=True
@@ -17,6 +17,7 @@ import json
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.llm.base import BaseLLMProvider
 from app.core.llm import get_llm_provider
+from .constants import HIGH_RISK_LEVELS
 
 logger = logging.getLogger(__name__)
 
@@ -796,7 +797,7 @@ Consider real-world factors like required attacker sophistication, common defens
         
         for path in paths:
             if (path.path_feasibility != "Theoretical" and 
-                path.combined_impact in ["Critical", "High"]):
+                path.combined_impact in HIGH_RISK_LEVELS):
                 critical_scenarios.append(path.scenario_name)
                 if len(critical_scenarios) >= 5:
                     break
@@ -0,0 +1,4 @@
+"""Constants shared by the pipeline steps"""
+
+# Risk, impact and severity levels treated as high priority
+HIGH_RISK_LEVELS = frozenset({"Critical", "High"})
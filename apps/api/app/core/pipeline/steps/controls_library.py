@@ -81,13 +81,14 @@ class ControlsLibrary:
             found_keywords = []
             for keyword in control_info['keywords']:
                 if keyword in document_lower:
-                    # Find context around keyword
+                    # Find context around the first mention; later mentions are never used.
+                    # The document is already lowercased, so no re.IGNORECASE is needed.
                     pattern = r'.{0,50}' + re.escape(keyword) + r'.{0,50}'
-                    matches = re.findall(pattern, document_lower, re.IGNORECASE)
-                    if matches:
+                    match = re.search(pattern, document_lower)
+                    if match:
                         found_keywords.append({
                             'keyword': keyword,
-                            'context': matches[0].strip(),
+                            'context': match.group(0).strip(),
                             'control_type': control_type
                         })
             
@@ -16,6 +16,7 @@ Expected improvements:
 - Security gap analysis and recommendations
 """
 
+import asyncio
 import logging
 from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
@@ -157,7 +158,9 @@ async def extract_dfd_enhanced(
             
             # Add confidence scoring if enabled
             if enable_confidence_scoring:
-                confidence_scores = enhancer.confidence_scorer.calculate_scores(final_dfd, document_text)
+                confidence_scores = await asyncio.to_thread(
+                    enhancer.confidence_scorer.calculate_scores, final_dfd, document_text
+                )
                 quality_report["confidence_scores"] = [
                     {
                         "component": score.component_name,
@@ -170,7 +173,9 @@ async def extract_dfd_enhanced(
             
             # Add security validation if enabled
             if enable_security_validation:
-                security_gaps = enhancer.security_validator.validate(final_dfd, document_text)
+                security_gaps = await asyncio.to_thread(
+                    enhancer.security_validator.validate, final_dfd, document_text
+                )
                 quality_report["security_gaps"] = [
                     {
                         "type": gap.gap_type,
@@ -9,15 +9,18 @@ This system significantly improves DFD extraction accuracy by:
 4. Pattern Recognition - Identifies common missing patterns
 """
 
+import asyncio
 import json
 import re
 import logging
+from collections import defaultdict
 from typing import Dict, Any, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from enum import Enum
 
 from app.core.llm import get_llm_provider
 from app.models.dfd import DFDComponents, DataFlow
+from app.utils.prompt_template import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
@@ -134,14 +137,16 @@ SECURITY_VALIDATION_CHECKLIST = [
 ]
 
 
-class STRIDEExpertAgent:
-    """
-    Expert Cybersecurity Architect specializing in STRIDE threat modeling.
-    Reviews initial DFD extractions and identifies missing security-critical components.
-    """
-    
-    def __init__(self):
-        self.expert_prompt_template = """
+# Keyword hints used by ConfidenceScorer, built once instead of per component
+STORAGE_KEYWORDS = ('database', 'store', 'storage', 'repository', 'cache')
+PROCESS_KEYWORDS = ('service', 'server', 'application', 'api', 'engine')
+GENERIC_COMPONENT_NAMES = frozenset({'system', 'component', 'service', 'application'})
+# Verbs that describe a data flow from the first-named endpoint to the second
+FLOW_SEND_VERBS = ('send', 'transmit', 'flow', 'pass')
+FLOW_RECEIVE_VERBS = ('receive', 'get', 'fetch', 'pull')
+
+# Parsed once at import; STRIDEExpertAgent is created for every enhancement run
+STRIDE_EXPERT_PROMPT_TEMPLATE = """
 You are a Senior Cybersecurity Architect with 15+ years of experience in STRIDE threat modeling and secure system design.
 
 Your task: Review the initial DFD extraction and identify missing components that are CRITICAL for comprehensive security analysis.
@@ -246,6 +251,18 @@ Output your findings as a JSON object with this structure:
 
 Be specific and justify each addition with evidence from the document.
 """
+STRIDE_EXPERT_PROMPT = PromptTemplate(STRIDE_EXPERT_PROMPT_TEMPLATE)
+
+
+class STRIDEExpertAgent:
+    """
+    Expert Cybersecurity Architect specializing in STRIDE threat modeling.
+    Reviews initial DFD extractions and identifies missing security-critical components.
+    """
+    
+    def __init__(self):
+        self.expert_prompt_template = STRIDE_EXPERT_PROMPT_TEMPLATE
+        self._expert_prompt = STRIDE_EXPERT_PROMPT
     
     async def review_dfd(
         self, 
@@ -257,7 +274,7 @@ Be specific and justify each addition with evidence from the document.
         # Prepare the prompt with context
         initial_dfd_json = initial_dfd.model_dump_json(indent=2)
         
-        prompt = self.expert_prompt_template.format(
+        prompt = self._expert_prompt.render(
             document_text=document_text,  # No character limit
             initial_dfd_json=initial_dfd_json
         )
@@ -350,6 +367,8 @@ class ConfidenceScorer:
         """Calculate confidence scores for all DFD components."""
         
         scores = []
+        # Lowercased once here; the scorers match lowercase patterns against it
+        # without re.IGNORECASE, which is several times slower on long documents
         doc_lower = document_text.lower()
         
         # Score external entities
@@ -393,29 +412,35 @@ class ConfidenceScorer:
         
         comp_lower = component_name.lower()
         
+        # Every pattern below contains the component name, so a name that never
+        # appears in the (lowercased) document can skip the regex scans entirely
+        mentioned = comp_lower in document_text
+        
         # Check for explicit mentions
         explicit_mentions = 0
-        for pattern in self.explicit_mention_patterns:
-            regex = pattern.format(re.escape(comp_lower))
-            matches = re.findall(regex, document_text, re.IGNORECASE)
-            explicit_mentions += len(matches)
-            if matches:
-                evidence.append(f"Explicitly mentioned {len(matches)} times")
+        if mentioned:
+            for pattern in self.explicit_mention_patterns:
+                regex = pattern.format(re.escape(comp_lower))
+                matches = re.findall(regex, document_text)
+                explicit_mentions += len(matches)
+                if matches:
+                    evidence.append(f"Explicitly mentioned {len(matches)} times")
         
         # Base confidence from explicit mentions
         confidence = min(0.9, base_confidence + explicit_mentions * 0.2)
         
         # Bonus for descriptive context
-        context_patterns = [
-            rf'{re.escape(comp_lower)}\s+(?:handles|manages|processes|stores|contains)',
-            rf'(?:connect|access|query|call)\s+{re.escape(comp_lower)}',
-            rf'{re.escape(comp_lower)}\s+(?:database|service|server|api|application)'
-        ]
-        
-        for pattern in context_patterns:
-            if re.search(pattern, document_text, re.IGNORECASE):
-                confidence += 0.1
-                evidence.append("Found in descriptive context")
+        if mentioned:
+            context_patterns = [
+                rf'{re.escape(comp_lower)}\s+(?:handles|manages|processes|stores|contains)',
+                rf'(?:connect|access|query|call)\s+{re.escape(comp_lower)}',
+                rf'{re.escape(comp_lower)}\s+(?:database|service|server|api|application)'
+            ]
+            
+            for pattern in context_patterns:
+                if re.search(pattern, document_text):
+                    confidence += 0.1
+                    evidence.append("Found in descriptive context")
         
         # Component type specific adjustments
         if comp_type == ComponentType.EXTERNAL_ENTITY:
@@ -426,21 +451,18 @@ class ConfidenceScorer:
         
         elif comp_type == ComponentType.DATA_STORE:
             # Look for storage-related keywords
-            storage_keywords = ['database', 'store', 'storage', 'repository', 'cache']
-            if any(keyword in comp_lower for keyword in storage_keywords):
+            if any(keyword in comp_lower for keyword in STORAGE_KEYWORDS):
                 confidence += 0.1
                 evidence.append("Contains storage-related keywords")
         
         elif comp_type == ComponentType.PROCESS:
             # Look for process-related keywords
-            process_keywords = ['service', 'server', 'application', 'api', 'engine']
-            if any(keyword in comp_lower for keyword in process_keywords):
+            if any(keyword in comp_lower for keyword in PROCESS_KEYWORDS):
                 confidence += 0.1
                 evidence.append("Contains process-related keywords")
         
         # Penalize very generic names
-        generic_names = ['system', 'component', 'service', 'application']
-        if comp_lower in generic_names:
+        if comp_lower in GENERIC_COMPONENT_NAMES:
             confidence *= 0.6
             concerns.append("Very generic component name")
         
@@ -455,30 +477,50 @@ class ConfidenceScorer:
             concerns=concerns
         )
     
+    @staticmethod
+    def _mentioned_in_order(text: str, first: str, verbs: Tuple[str, ...], last: str) -> bool:
+        """
+        Check whether a line of text contains first, then one of verbs, then last.
+        Same matches as the regex first.*(?:verbs).*last, without its backtracking on long lines:
+        the earliest match of each part leaves the most room for the parts after it.
+        """
+        start = text.find(first)
+        while start != -1:
+            line_end = text.find('\n', start)
+            if line_end == -1:
+                line_end = len(text)
+            after_first = start + len(first)
+            verb_ends = [i + len(verb) for verb in verbs if (i := text.find(verb, after_first, line_end)) != -1]
+            if verb_ends and text.find(last, min(verb_ends), line_end) != -1:
+                return True
+            start = text.find(first, line_end + 1)
+        return False
+    
     def _score_data_flow(self, flow: DataFlow, document_text: str) -> ConfidenceScore:
         """Score a data flow."""
         evidence = []
         concerns = []
         base_confidence = 0.3  # Data flows are often inferred
         
-        # Look for explicit flow descriptions
-        flow_patterns = [
-            rf'{re.escape(flow.source.lower())}.*(?:send|transmit|flow|pass).*{re.escape(flow.destination.lower())}',
-            rf'{re.escape(flow.destination.lower())}.*(?:receive|get|fetch|pull).*{re.escape(flow.source.lower())}',
-            rf'(?:from|via)\s+{re.escape(flow.source.lower())}\s+(?:to|into)\s+{re.escape(flow.destination.lower())}'
-        ]
+        # document_text is already lowercased by calculate_scores
+        source = flow.source.lower()
+        destination = flow.destination.lower()
         
-        confidence = base_confidence
+        # Check if both endpoints exist in document
+        source_mentioned = source in document_text
+        dest_mentioned = destination in document_text
         
-        for pattern in flow_patterns:
-            if re.search(pattern, document_text, re.IGNORECASE):
-                confidence += 0.2
-                evidence.append("Flow explicitly described in document")
-                break
+        confidence = base_confidence
         
-        # Check if both endpoints exist in document
-        source_mentioned = flow.source.lower() in document_text.lower()
-        dest_mentioned = flow.destination.lower() in document_text.lower()
+        # Look for explicit flow descriptions.
+        # Every pattern needs both endpoint names, so skip the scan unless both appear.
+        if source_mentioned and dest_mentioned and (
+            self._mentioned_in_order(document_text, source, FLOW_SEND_VERBS, destination)
+            or self._mentioned_in_order(document_text, destination, FLOW_RECEIVE_VERBS, source)
+            or re.search(rf'(?:from|via)\s+{re.escape(source)}\s+(?:to|into)\s+{re.escape(destination)}', document_text)
+        ):
+            confidence += 0.2
+            evidence.append("Flow explicitly described in document")
         
         if source_mentioned and dest_mentioned:
             confidence += 0.2
@@ -549,6 +591,20 @@ class SecurityValidator:
     ) -> Optional[SecurityGap]:
         """Validate a single security check."""
         
+        # Check if required based on system type
+        is_required = False
+        if "all" in check['required_for']:
+            is_required = True
+        else:
+            for req_type in check['required_for']:
+                if req_type in document_text:
+                    is_required = True
+                    break
+        
+        # A check that doesn't apply can never be a gap, so skip the scans
+        if not is_required:
+            return None
+        
         # Check if any component matches this security function
         found_components = []
         
@@ -566,17 +622,7 @@ class SecurityValidator:
         # Determine if this is a gap
         is_gap = len(found_components) == 0 and len(doc_mentions) == 0
         
-        # Check if required based on system type
-        is_required = False
-        if "all" in check['required_for']:
-            is_required = True
-        else:
-            for req_type in check['required_for']:
-                if req_type in document_text:
-                    is_required = True
-                    break
-        
-        if is_gap and is_required:
+        if is_gap:
             severity = "Critical" if check['security_critical'] else "Medium"
             
             return SecurityGap(
@@ -625,11 +671,18 @@ class DFDQualityEnhancer:
         # Stage 2: Apply Expert Recommendations
         enhanced_dfd = self._apply_expert_recommendations(initial_dfd, expert_findings)
         
+        # Stages 3 and 4 are regex/substring scans over the whole document, so run them
+        # in a worker thread instead of blocking the event loop
+        
         # Stage 3: Calculate Confidence Scores
-        confidence_scores = self.confidence_scorer.calculate_scores(enhanced_dfd, document_text)
+        confidence_scores = await asyncio.to_thread(
+            self.confidence_scorer.calculate_scores, enhanced_dfd, document_text
+        )
         
         # Stage 4: Security Validation
-        security_gaps = self.security_validator.validate(enhanced_dfd, document_text)
+        security_gaps = await asyncio.to_thread(
+            self.security_validator.validate, enhanced_dfd, document_text
+        )
         
         # Stage 5: Generate Validation Report
         validation_report = self._generate_validation_report(
@@ -663,21 +716,25 @@ class DFDQualityEnhancer:
         # Create enhanced copy
         enhanced_data = initial_dfd.model_dump()
         
-        # Add missing processes
+        # Add missing processes (sets mirror the lists so each lookup is O(1))
+        known_processes = set(enhanced_data['processes'])
         for process in expert_findings.get('missing_processes', []):
-            if process['name'] not in enhanced_data['processes']:
+            if process['name'] not in known_processes:
+                known_processes.add(process['name'])
                 enhanced_data['processes'].append(process['name'])
         
         # Add missing assets
+        known_assets = set(enhanced_data['assets'])
         for asset in expert_findings.get('missing_assets', []):
-            if asset['name'] not in enhanced_data['assets']:
+            if asset['name'] not in known_assets:
+                known_assets.add(asset['name'])
                 enhanced_data['assets'].append(asset['name'])
         
         # Add missing data flows
-        existing_flows = {f"{flow.source}→{flow.destination}" for flow in initial_dfd.data_flows}
+        existing_flows = {(flow.source, flow.destination) for flow in initial_dfd.data_flows}
         
         for flow_data in expert_findings.get('missing_data_flows', []):
-            flow_key = f"{flow_data['source']}→{flow_data['destination']}"
+            flow_key = (flow_data['source'], flow_data['destination'])
             if flow_key not in existing_flows:
                 new_flow = DataFlow(
                     source=flow_data['source'],
@@ -690,8 +747,10 @@ class DFDQualityEnhancer:
                 enhanced_data['data_flows'].append(new_flow.model_dump())
         
         # Add missing trust boundaries
+        known_boundaries = set(enhanced_data['trust_boundaries'])
         for boundary in expert_findings.get('missing_trust_boundaries', []):
-            if boundary['name'] not in enhanced_data['trust_boundaries']:
+            if boundary['name'] not in known_boundaries:
+                known_boundaries.add(boundary['name'])
                 enhanced_data['trust_boundaries'].append(boundary['name'])
         
         return DFDComponents(**enhanced_data)
@@ -714,24 +773,33 @@ class DFDQualityEnhancer:
             'trust_boundaries_added': len(enhanced_dfd.trust_boundaries) - len(initial_dfd.trust_boundaries)
         }
         
-        # Calculate confidence statistics
-        confidences = [score.confidence for score in confidence_scores]
+        # Calculate confidence statistics in one pass
+        confidence_total = 0.0
+        low_confidence_count = 0
+        high_confidence_count = 0
+        for score in confidence_scores:
+            confidence_total += score.confidence
+            if score.confidence < 0.5:
+                low_confidence_count += 1
+            elif score.confidence >= 0.8:
+                high_confidence_count += 1
         confidence_stats = {
-            'average_confidence': sum(confidences) / len(confidences) if confidences else 0,
-            'low_confidence_count': len([c for c in confidences if c < 0.5]),
-            'high_confidence_count': len([c for c in confidences if c >= 0.8])
+            'average_confidence': confidence_total / len(confidence_scores) if confidence_scores else 0,
+            'low_confidence_count': low_confidence_count,
+            'high_confidence_count': high_confidence_count
         }
         
-        # Categorize security gaps
-        critical_gaps = [gap for gap in security_gaps if gap.severity == "Critical"]
-        high_gaps = [gap for gap in security_gaps if gap.severity == "High"]
+        # Count security gaps by severity
+        gap_counts = defaultdict(int)
+        for gap in security_gaps:
+            gap_counts[gap.severity] += 1
         
         return {
             'enhancement_summary': improvements,
             'confidence_analysis': confidence_stats,
             'security_assessment': {
-                'critical_gaps': len(critical_gaps),
-                'high_priority_gaps': len(high_gaps),
+                'critical_gaps': gap_counts['Critical'],
+                'high_priority_gaps': gap_counts['High'],
                 'total_gaps': len(security_gaps)
             },
             'expert_contributions': {
@@ -13,6 +13,7 @@ from pydantic import BaseModel, Field, ValidationError
 
 from app.core.llm.base import BaseLLMProvider
 from app.utils.token_counter import TokenCounter
+from app.utils.prompt_template import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
@@ -182,13 +183,13 @@ Return enhanced JSON in the same format, adding:
 
 Add these fields to the JSON:
 - "quality_score": 0.0-1.0 (completeness score)
-- "completeness_indicators": {
+- "completeness_indicators": {{
   "assets_complete": true|false,
   "data_flows_complete": true|false,
   "trust_zones_complete": true|false,
   "security_controls_complete": true|false,
   "stride_analysis_complete": true|false
-}
+}}
 
 Original document:
 {document}
@@ -198,6 +199,7 @@ Extracted data to validate and enhance:
 
 Return the enhanced JSON structure:
 """
+QUALITY_VALIDATOR_TEMPLATE = PromptTemplate(QUALITY_VALIDATOR_PROMPT)
 
 class StrideDataExtractor:
     """STRIDE-focused data extraction with quality validation"""
@@ -320,8 +322,8 @@ class StrideDataExtractor:
         
         # Prepare validation prompt
         stride_json = stride_data.model_dump_json(indent=2)
-        prompt = QUALITY_VALIDATOR_PROMPT.format(
-            document=document_text[:3000],  # Truncate for token limits
+        prompt = QUALITY_VALIDATOR_TEMPLATE.render(
+            document=TokenCounter.truncate_to_tokens(document_text, 1000),  # Truncate for token limits
             extracted_data=stride_json
         )
         
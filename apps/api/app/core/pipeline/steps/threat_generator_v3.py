@@ -11,6 +11,7 @@ traditional STRIDE analysis with architectural, business, and compliance perspec
 
 import json
 import logging
+from collections import defaultdict
 from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -32,6 +33,7 @@ from .controls_library import ControlsLibrary, ResidualRiskCalculator, SECURITY_
 
 # Import multi-agent components
 from .analyzer_agents import MultiAgentOrchestrator
+from .constants import HIGH_RISK_LEVELS
 
 # Import CWE retrieval service
 from app.services.ingestion_service import IngestionService
@@ -85,19 +87,18 @@ class ThreatGeneratorV3:
             logger.info("🤖 Starting V3 integrated multi-agent threat analysis")
             
             # Ensure component_data is a dictionary, not a JSON string
-            import json
             if isinstance(component_data, str):
                 logger.warning("⚠️ Component data is a string, parsing JSON...")
                 try:
                     component_data = json.loads(component_data)
                 except json.JSONDecodeError as e:
-                    logger.error(f"❌ Failed to parse component data JSON: {e}")
+                    logger.error("❌ Failed to parse component data JSON: %s", e)
                     raise ValueError(f"Invalid component data format: {e}")
             
             # Log input data summary
             components_count = len(component_data.get('processes', [])) + len(component_data.get('assets', [])) + len(component_data.get('external_entities', []))
             doc_length = len(document_text) if document_text else 0
-            logger.info(f"📊 Input summary: {components_count} components, {doc_length} chars document text")
+            logger.info("📊 Input summary: %d components, %d chars document text", components_count, doc_length)
             
             # Step 0: Retrieve relevant CWE entries for context enhancement
             logger.info("🔍 === PHASE 0: CWE KNOWLEDGE BASE RETRIEVAL ===")
@@ -112,7 +113,7 @@ class ThreatGeneratorV3:
             logger.info("🔒 Parsing document for security controls...")
             if document_text:
                 detected_controls = self.controls_library.parse_document_for_controls(document_text)
-                logger.info(f"✅ Detected {len(detected_controls)} types of security controls")
+                logger.info("✅ Detected %d types of security controls", len(detected_controls))
             else:
                 logger.warning("⚠️ No document text provided, proceeding without control detection")
                 detected_controls = {}
@@ -120,7 +121,7 @@ class ThreatGeneratorV3:
             # DEFENSIVE PROGRAMMING: Ensure all control-related variables are defined
             security_controls = detected_controls  # Explicit alias for any legacy references
             controls_detected = detected_controls  # Another common alias
-            logger.info(f"🛡️ Security controls variables initialized: {len(detected_controls)} controls")
+            logger.info("🛡️ Security controls variables initialized: %d controls", len(detected_controls))
             
             # Generate core STRIDE threats using LLM
             logger.info("🎯 Generating STRIDE threats with CWE context...")
@@ -136,15 +137,15 @@ class ThreatGeneratorV3:
             for threat in context_aware_threats:
                 risk_calculator.calculate_residual_risk(threat)
             
-            logger.info(f"✅ Context-aware generation complete: {len(context_aware_threats)} threats with residual risk")
-            logger.info(f"🔒 Security controls detected: {len(detected_controls)}")
+            logger.info("✅ Context-aware generation complete: %d threats with residual risk", len(context_aware_threats))
+            logger.info("🔒 Security controls detected: %d", len(detected_controls))
             
             # Step 2: Run multi-agent analysis
             logger.info("👥 === PHASE 2: MULTI-AGENT SPECIALIZED ANALYSIS ===")
-            logger.info(f"📄 Document text available: {document_text is not None}")
-            logger.info(f"📝 Document length: {len(document_text) if document_text else 0} characters")
+            logger.info("📄 Document text available: %s", document_text is not None)
+            logger.info("📝 Document length: %d characters", len(document_text) if document_text else 0)
             if document_text:
-                logger.info(f"📝 Document text length: {len(document_text)} characters")
+                logger.info("📝 Document text length: %d characters", len(document_text))
             
             if document_text and len(document_text.strip()) > 50:
                 logger.info("🤖 Starting multi-agent analysis with 3 specialized agents and CWE context...")
@@ -159,9 +160,9 @@ class ThreatGeneratorV3:
                 business_risks = agent_results.get('business_risks', [])
                 compliance_risks = agent_results.get('compliance_risks', [])
                 
-                logger.info(f"🏗️ Architectural agent found: {len(architectural_risks)} risks")
-                logger.info(f"💼 Business agent found: {len(business_risks)} risks") 
-                logger.info(f"⚖️ Compliance agent found: {len(compliance_risks)} risks")
+                logger.info("🏗️ Architectural agent found: %d risks", len(architectural_risks))
+                logger.info("💼 Business agent found: %d risks", len(business_risks))
+                logger.info("⚖️ Compliance agent found: %d risks", len(compliance_risks))
             else:
                 logger.warning("⚠️ No sufficient document text provided, skipping multi-agent analysis")
                 logger.warning("💡 Multi-agent analysis requires document text for comprehensive threat modeling")
@@ -198,7 +199,7 @@ class ThreatGeneratorV3:
             final_detected_controls = detected_controls if 'detected_controls' in locals() else {}
             final_security_controls = final_detected_controls  # Legacy compatibility
             
-            logger.info(f"🛡️ Final controls check: {len(final_detected_controls)} controls available")
+            logger.info("🛡️ Final controls check: %d controls available", len(final_detected_controls))
             
             result = {
                 "threats": prioritized_threats,  # All threats
@@ -255,13 +256,13 @@ class ThreatGeneratorV3:
             
             await db_session.commit()
             
-            logger.info(f"Threat Generator V3 completed: {len(prioritized_threats)} total threats identified")
+            logger.info("Threat Generator V3 completed: %d total threats identified", len(prioritized_threats))
             
             return result
             
         except Exception as e:
-            logger.error(f"Error in Threat Generator V3: {str(e)}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("Error in Threat Generator V3: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             
             # DEFENSIVE: Check if it's the security_controls error
             error_str = str(e).lower()
@@ -301,7 +302,7 @@ class ThreatGeneratorV3:
                     return result
                     
                 except Exception as emergency_e:
-                    logger.error(f"❌ Emergency recovery also failed: {emergency_e}")
+                    logger.error("❌ Emergency recovery also failed: %s", emergency_e)
             
             if pipeline_step_result:
                 pipeline_step_result.status = "failed"
@@ -326,7 +327,7 @@ class ThreatGeneratorV3:
                 threat['threat_class'] = 'technical'
                 all_threats.append(threat)
             else:
-                logger.warning(f"⚠️ Skipping invalid context_aware threat (not dict): {type(threat)} - {str(threat)[:100]}")
+                logger.warning("⚠️ Skipping invalid context_aware threat (not dict): %s - %.100s", type(threat), threat)
         
         for threat in architectural:
             if isinstance(threat, dict):
@@ -334,7 +335,7 @@ class ThreatGeneratorV3:
                 threat['threat_class'] = 'architectural'
                 all_threats.append(threat)
             else:
-                logger.warning(f"⚠️ Skipping invalid architectural threat (not dict): {type(threat)} - {str(threat)[:100]}")
+                logger.warning("⚠️ Skipping invalid architectural threat (not dict): %s - %.100s", type(threat), threat)
         
         for threat in business:
             if isinstance(threat, dict):
@@ -342,7 +343,7 @@ class ThreatGeneratorV3:
                 threat['threat_class'] = 'business'
                 all_threats.append(threat)
             else:
-                logger.warning(f"⚠️ Skipping invalid business threat (not dict): {type(threat)} - {str(threat)[:100]}")
+                logger.warning("⚠️ Skipping invalid business threat (not dict): %s - %.100s", type(threat), threat)
         
         for threat in compliance:
             if isinstance(threat, dict):
@@ -350,7 +351,7 @@ class ThreatGeneratorV3:
                 threat['threat_class'] = 'compliance'
                 all_threats.append(threat)
             else:
-                logger.warning(f"⚠️ Skipping invalid compliance threat (not dict): {type(threat)} - {str(threat)[:100]}")
+                logger.warning("⚠️ Skipping invalid compliance threat (not dict): %s - %.100s", type(threat), threat)
         
         # Remove obvious duplicates (same name and component)
         seen = set()
@@ -359,7 +360,7 @@ class ThreatGeneratorV3:
         for threat in all_threats:
             # Defensive check before accessing threat properties
             if not isinstance(threat, dict):
-                logger.warning(f"⚠️ Skipping invalid threat in deduplication (not dict): {type(threat)}")
+                logger.warning("⚠️ Skipping invalid threat in deduplication (not dict): %s", type(threat))
                 continue
                 
             key = (
@@ -391,7 +392,7 @@ class ThreatGeneratorV3:
         for threat in threats:
             # Defensive check - ensure threat is a dictionary
             if not isinstance(threat, dict):
-                logger.warning(f"⚠️ Skipping invalid threat in prioritization (not dict): {type(threat)} - {str(threat)[:100]}")
+                logger.warning("⚠️ Skipping invalid threat in prioritization (not dict): %s - %.100s", type(threat), threat)
                 continue
                 
             # Base scores
@@ -448,7 +449,7 @@ class ThreatGeneratorV3:
         # Filter out invalid threats (defensive programming)
         valid_threats = [t for t in threats if isinstance(t, dict)]
         if len(valid_threats) < len(threats):
-            logger.warning(f"⚠️ Filtered out {len(threats) - len(valid_threats)} invalid threats in critical gaps analysis")
+            logger.warning("⚠️ Filtered out %d invalid threats in critical gaps analysis", len(threats) - len(valid_threats))
         
         # Check for critical architectural issues
         arch_threats = [t for t in valid_threats if t.get('threat_class') == 'architectural']
@@ -461,7 +462,7 @@ class ThreatGeneratorV3:
             gaps.append("Multiple compliance requirements not met")
         
         # Check for high residual risks
-        high_residual = [t for t in valid_threats if t.get('residual_risk') in ['Critical', 'High']]
+        high_residual = [t for t in valid_threats if t.get('residual_risk') in HIGH_RISK_LEVELS]
         if len(high_residual) > 10:
             gaps.append("Insufficient security controls for high-risk threats")
         
@@ -479,8 +480,12 @@ class ThreatGeneratorV3:
     ) -> Dict[str, Any]:
         """Generate executive summary of findings."""
         
-        critical_count = len([t for t in threats if t.get('priority_category') == 'Critical'])
-        high_count = len([t for t in threats if t.get('priority_category') == 'High'])
+        # Count priority categories in one pass
+        priority_counts = defaultdict(int)
+        for threat in threats:
+            priority_counts[threat.get('priority_category')] += 1
+        critical_count = priority_counts.get('Critical', 0)
+        high_count = priority_counts.get('High', 0)
         
         # Risk assessment
         if critical_count > 10:
@@ -513,15 +518,12 @@ class ThreatGeneratorV3:
         concerns = []
         
         # Group threats by class
-        by_class = {}
+        by_class = defaultdict(int)
         for threat in threats[:20]:  # Look at top 20
             # Defensive check
             if not isinstance(threat, dict):
                 continue
-            threat_class = threat.get('threat_class', 'unknown')
-            if threat_class not in by_class:
-                by_class[threat_class] = 0
-            by_class[threat_class] += 1
+            by_class[threat.get('threat_class', 'unknown')] += 1
         
         # Generate concerns based on distribution
         if by_class.get('architectural', 0) > 5:
@@ -631,7 +633,7 @@ class ThreatGeneratorV3:
         
         try:
             components = component_data.get('components', [])
-            logger.info(f"🔍 Retrieving CWE context for {len(components)} components")
+            logger.info("🔍 Retrieving CWE context for %d components", len(components))
             
             for component in components:
                 component_name = component.get('name', 'unknown')
@@ -654,17 +656,17 @@ class ThreatGeneratorV3:
                 
                 if cwe_entries:
                     cwe_context[component_name] = cwe_entries
-                    logger.info(f"🎯 Found {len(cwe_entries)} relevant CWE entries for {component_name}")
+                    logger.info("🎯 Found %d relevant CWE entries for %s", len(cwe_entries), component_name)
                 else:
-                    logger.info(f"⚠️ No CWE entries found for {component_name} (type: {cwe_component_type})")
+                    logger.info("⚠️ No CWE entries found for %s (type: %s)", component_name, cwe_component_type)
             
             total_cwe_entries = sum(len(entries) for entries in cwe_context.values())
-            logger.info(f"📚 Retrieved {total_cwe_entries} total CWE entries across all components")
+            logger.info("📚 Retrieved %d total CWE entries across all components", total_cwe_entries)
             
             return cwe_context
             
         except Exception as e:
-            logger.warning(f"Error retrieving CWE context: {e}")
+            logger.warning("Error retrieving CWE context: %s", e)
             return {}
     
     def _map_to_cwe_component_type(self, component_type: str) -> str:
@@ -731,7 +733,7 @@ class ThreatGeneratorV3:
                     'cwe_count': len(cwe_entries)
                 }
                 
-                logger.info(f"🔗 Enhanced {component_name} with {len(cwe_entries)} CWE entries")
+                logger.info("🔗 Enhanced %s with %d CWE entries", component_name, len(cwe_entries))
         
         # Add global CWE metadata
         total_cwe_entries = sum(len(entries) for entries in cwe_context.values())
@@ -741,7 +743,7 @@ class ThreatGeneratorV3:
             'cwe_integration_enabled': True
         }
         
-        logger.info(f"📋 Component data enhanced with CWE context ({total_cwe_entries} total entries)")
+        logger.info("📋 Component data enhanced with CWE context (%d total entries)", total_cwe_entries)
         
         return enhanced_data
     
@@ -796,7 +798,7 @@ class ThreatGeneratorV3:
                 document_text
             )
         except Exception as e:
-            logger.error(f"❌ Core threat generation failed, using fallback: {e}")
+            logger.error("❌ Core threat generation failed, using fallback: %s", e)
             fallback_data = await FallbackStrategies.get_sample_threats()
             return fallback_data.get("threats", [])
 
@@ -821,14 +823,14 @@ class ThreatGeneratorV3:
             components = self._extract_components(component_data)
             data_flows = component_data.get('data_flows', [])
             
-            logger.info(f"🔍 Analyzing {len(components)} components and {len(data_flows)} data flows")
+            logger.info("🔍 Analyzing %d components and %d data flows", len(components), len(data_flows))
             
             # Generate threats for high-priority components
             all_threats = []
             selected_components = components[:15]  # Focus on top components
             
             for component in selected_components:
-                logger.debug(f"🎯 Generating threats for component: {component.get('name', 'Unknown')}")
+                logger.debug("🎯 Generating threats for component: %s", component.get('name', 'Unknown'))
                 
                 # Create component-specific prompt
                 component_prompt = self._create_threat_prompt(
@@ -847,11 +849,11 @@ class ThreatGeneratorV3:
                 component_threats = self._parse_threat_response(response.content, component)
                 all_threats.extend(component_threats)
             
-            logger.info(f"✅ Generated {len(all_threats)} core STRIDE threats")
+            logger.info("✅ Generated %d core STRIDE threats", len(all_threats))
             return all_threats
             
         except Exception as e:
-            logger.error(f"❌ Error in core threat generation: {e}")
+            logger.error("❌ Error in core threat generation: %s", e)
             return []
     
     def _extract_components(self, component_data: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -926,21 +928,18 @@ Format as JSON array of threat objects.
     def _parse_threat_response(self, response: str, component: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Parse LLM response into threat objects."""
         try:
-            # Try to extract JSON from response
-            import json
-            import re
-            
-            # Look for JSON array in response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                threats_data = json.loads(json_match.group())
+            # Look for JSON array in response (outermost brackets, no regex backtracking)
+            start = response.find('[')
+            end = response.rfind(']')
+            if start != -1 and end > start:
+                threats_data = json.loads(response[start:end + 1])
                 
                 # Normalize threat format
                 threats = []
                 for threat in threats_data:
                     # Defensive programming: ensure threat is a dictionary
                     if not isinstance(threat, dict):
-                        logger.warning(f"⚠️ Skipping invalid threat in parse_threat_response (not dict): {type(threat)}")
+                        logger.warning("⚠️ Skipping invalid threat in parse_threat_response (not dict): %s", type(threat))
                         continue
                     
                     normalized_threat = {
@@ -958,7 +957,7 @@ Format as JSON array of threat objects.
                 return threats
             
         except Exception as e:
-            logger.warning(f"⚠️ Failed to parse threat response as JSON: {e}")
+            logger.warning("⚠️ Failed to parse threat response as JSON: %s", e)
         
         # Fallback: create a basic threat if parsing fails
         return [{
@@ -992,16 +991,19 @@ Format as JSON array of threat objects.
     def _calculate_risk_metrics(self, threats: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate risk distribution metrics."""
         risk_levels = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
+        mitigated_count = 0
         
         for threat in threats:
             # Defensive check
             if not isinstance(threat, dict):
-                logger.warning(f"⚠️ Skipping invalid threat in risk metrics (not dict): {type(threat)}")
+                logger.warning("⚠️ Skipping invalid threat in risk metrics (not dict): %s", type(threat))
                 continue
                 
             risk_level = threat.get('residual_risk_level', threat.get('impact', 'Medium'))
             if risk_level in risk_levels:
                 risk_levels[risk_level] += 1
+            if threat.get('applicable_controls'):
+                mitigated_count += 1
         
         total_threats = len(threats)
         
@@ -1012,5 +1014,5 @@ Format as JSON array of threat objects.
                 ((risk_levels['Critical'] + risk_levels['High']) / total_threats * 100) 
                 if total_threats > 0 else 0, 1
             ),
-            'controls_effectiveness': f"{len([t for t in threats if t.get('applicable_controls', [])])} of {total_threats} threats mitigated"
+            'controls_effectiveness': f"{mitigated_count} of {total_threats} threats mitigated"
         }
\ No newline at end of file
@@ -19,6 +19,7 @@ from app.core.llm import get_llm_provider
 from app.services.ingestion_service import IngestionService
 from app.services.prompt_service import PromptService
 from app.config import settings
+from .constants import HIGH_RISK_LEVELS
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +107,7 @@ class ThreatRefiner:
             # Identify critical threats for business analysis
             critical_threats = [
                 t for t in risk_assessed_threats 
-                if t.get("risk_score") in ["Critical", "High"]
+                if t.get("risk_score") in HIGH_RISK_LEVELS
             ]
             logger.info(f"🎯 Identified {len(critical_threats)} critical/high-risk threats for business analysis")
             
@@ -161,10 +162,11 @@ class ThreatRefiner:
         for threat in threats:
             # Create signature from key fields
             name = threat.get("Threat Name", "").lower().strip()
-            description = threat.get("Description", "").lower().strip()[:100]
+            # Only the description prefix is compared, so don't lowercase the rest
+            description = threat.get("Description", "").strip()[:100].lower()
             component = threat.get("component_name", "").lower().strip()
             
-            signature = f"{name}|{component}|{description}"
+            signature = (name, component, description)
             
             if signature not in seen_signatures:
                 seen_signatures.add(signature)
@@ -49,14 +49,15 @@ class CircuitBreaker:
         self.expected_exception = expected_exception
         
         self.failure_count = 0
-        self.last_failure_time = 0
+        self.last_failure_time = 0  # Wall-clock time, reported in circuit breaker status
+        self._last_failure_monotonic = 0.0  # Used for the open-state timeout, immune to clock changes
         self.state = CircuitBreakerState.CLOSED
         
     def __call__(self, func: F) -> F:
         @wraps(func)
         async def wrapper(*args, **kwargs):
             if self.state == CircuitBreakerState.OPEN:
-                if time.time() - self.last_failure_time < self.timeout:
+                if time.monotonic() - self._last_failure_monotonic < self.timeout:
                     logger.warning(f"🚫 Circuit breaker OPEN for {func.__name__}, rejecting call")
                     raise Exception(f"Circuit breaker open for {func.__name__}")
                 else:
@@ -77,6 +78,7 @@ class CircuitBreaker:
             except self.expected_exception as e:
                 self.failure_count += 1
                 self.last_failure_time = time.time()
+                self._last_failure_monotonic = time.monotonic()
                 
                 if self.failure_count >= self.failure_threshold:
                     self.state = CircuitBreakerState.OPEN
@@ -6,8 +6,10 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import NullPool
 import os
+import json
 import time
 import asyncio
+from functools import partial
 from .config import Settings
 import logging
 
@@ -31,18 +33,35 @@ else:
     DATABASE_URL = settings.database_url
     ASYNC_DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
 
+# asyncpg prepared statement caches: SQLAlchemy's per-connection cache and asyncpg's own
+# (see Settings.pg_pooler_mode). Only applies to PostgreSQL engines.
+if DATABASE_URL.startswith("sqlite"):
+    PG_STATEMENT_CACHE_ARGS = {}
+else:
+    _statement_cache_size = 0 if settings.pg_pooler_mode == "transaction" else settings.pg_statement_cache_size
+    PG_STATEMENT_CACHE_ARGS = {
+        "prepared_statement_cache_size": _statement_cache_size,
+        "statement_cache_size": _statement_cache_size,
+    }
+
+# JSON/JSONB columns (e.g. pipeline result_data) are written compactly: large V3 results
+# shrink by the whitespace json.dumps adds after every ',' and ':'
+compact_json_serializer = partial(json.dumps, separators=(',', ':'))
+
 # Create engines
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration
     engine = create_engine(
         DATABASE_URL, 
         connect_args={"check_same_thread": False},
-        poolclass=NullPool
+        poolclass=NullPool,
+        json_serializer=compact_json_serializer
     )
     async_engine = create_async_engine(
         ASYNC_DATABASE_URL,
         connect_args={"check_same_thread": False},
-        poolclass=NullPool
+        poolclass=NullPool,
+        json_serializer=compact_json_serializer
     )
 else:
     # PostgreSQL configuration with enhanced resilience and proper cleanup
@@ -55,19 +74,21 @@ else:
         pool_timeout=30,              # Timeout when getting connection from pool
         # Enhanced cleanup configuration
         pool_reset_on_return='commit', # Reset connections properly
+        json_serializer=compact_json_serializer,
     )
     # BULLETPROOF CONNECTION POOL - Fixed for asyncpg race conditions
     async_engine = create_async_engine(
         ASYNC_DATABASE_URL, 
         # Connection pool configuration optimized for asyncpg
-        pool_pre_ping=False,          # Disabled - causes race conditions with asyncpg
+        pool_pre_ping=settings.db_pool_pre_ping,  # Off by default - has caused race conditions with asyncpg
         pool_recycle=1800,            # Recycle connections every 30 minutes
-        pool_size=10,                 # Larger pool to reduce connection contention
-        max_overflow=5,               # Some overflow to handle bursts
+        pool_size=settings.db_pool_size,        # Larger pool to reduce connection contention
+        max_overflow=settings.db_pool_overflow, # Some overflow to handle bursts
         pool_timeout=30,              # Longer timeout for connection acquisition
         
-        # Asyncpg-specific configuration to prevent race conditions
+        # Asyncpg connection settings: statement cache, server settings and timeouts
         connect_args={
+            **PG_STATEMENT_CACHE_ARGS,
             "server_settings": {
                 "application_name": "threat_modeling_api_fixed",
                 "jit": "off",
@@ -80,6 +101,7 @@ else:
         # Enhanced error handling and cleanup
         pool_reset_on_return='rollback',     # Use rollback for safety
         echo=bool(os.getenv('SQL_DEBUG', False)),
+        json_serializer=compact_json_serializer,
     )
 
 # Create session makers
@@ -258,6 +280,34 @@ async def get_emergency_connection():
         logger.error(f"❌ Emergency connection failed: {e}")
         raise
 
+class EmergencySession:
+    """Minimal session-like wrapper around a direct asyncpg connection"""
+    
+    def __init__(self, conn):
+        self._conn = conn
+        self._fetch = conn.fetch
+        
+    async def execute(self, query, params=None):
+        if params:
+            return await self._fetch(str(query), *params)
+        else:
+            return await self._fetch(str(query))
+    
+    async def commit(self):
+        pass  # Direct connections auto-commit
+        
+    async def rollback(self):
+        pass  # Not needed for direct connections
+        
+    async def close(self):
+        await self._conn.close()
+        
+    async def __aenter__(self):
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
 async def get_resilient_session():
     """
     Get a database session with emergency fallback
@@ -274,31 +324,6 @@ async def get_resilient_session():
         # Create emergency session with direct connection
         emergency_conn = await get_emergency_connection()
         # Wrap in a minimal session-like object
-        class EmergencySession:
-            def __init__(self, conn):
-                self._conn = conn
-                
-            async def execute(self, query, params=None):
-                if params:
-                    return await self._conn.fetch(str(query), *params)
-                else:
-                    return await self._conn.fetch(str(query))
-            
-            async def commit(self):
-                pass  # Direct connections auto-commit
-                
-            async def rollback(self):
-                pass  # Not needed for direct connections
-                
-            async def close(self):
-                await self._conn.close()
-                
-            async def __aenter__(self):
-                return self
-                
-            async def __aexit__(self, exc_type, exc_val, exc_tb):
-                await self.close()
-        
         return EmergencySession(emergency_conn)
 
 # BULLETPROOF Connection pool management with intelligent recovery
@@ -326,13 +351,14 @@ async def reset_connection_pool():
         async_engine = create_async_engine(
             ASYNC_DATABASE_URL,
             # BULLETPROOF configuration - maximum stability
-            pool_pre_ping=False,
+            pool_pre_ping=settings.db_pool_pre_ping,
             pool_recycle=1800,            # 30 minutes
             pool_size=5,                  # More connections for stability
             max_overflow=0,               # NO overflow - prevents connection chaos
             pool_timeout=10,              # Fail fast
             
             connect_args={
+                **PG_STATEMENT_CACHE_ARGS,
                 "server_settings": {
                     "application_name": "threat_modeling_api_bulletproof",
                     "jit": "off",
@@ -376,7 +402,8 @@ async def reset_connection_pool():
                 pool_size=1,
                 max_overflow=0,
                 pool_timeout=5,
-                pool_pre_ping=False,
+                pool_pre_ping=settings.db_pool_pre_ping,
+                connect_args=PG_STATEMENT_CACHE_ARGS,
             )
             AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession)
             logger.warning("⚠️ Emergency engine created - limited functionality")
@@ -385,6 +412,38 @@ async def reset_connection_pool():
             logger.error(f"❌ FATAL: Emergency engine creation failed: {emergency_error}")
             return False
 
+# Startup pool warm-up
+async def warm_connection_pool() -> int:
+    """
+    Open the async pool's connections before serving traffic so the first burst of
+    requests doesn't pay connection setup. Best effort: failures are only logged.
+    Returns the number of connections warmed.
+    """
+    if not settings.warm_pool_on_startup or DATABASE_URL.startswith("sqlite"):
+        return 0
+    
+    # Hold all connections at once so each one is a separate pooled connection
+    connections = await asyncio.gather(
+        *(async_engine.connect() for _ in range(settings.db_pool_size)),
+        return_exceptions=True
+    )
+    
+    warmed = 0
+    for conn in connections:
+        if isinstance(conn, Exception):
+            logger.warning(f"⚠️ Connection pool warm-up failed (non-critical): {conn}")
+            continue
+        try:
+            await conn.execute(text("SELECT 1"))
+            warmed += 1
+        except Exception as warm_error:
+            logger.warning(f"⚠️ Connection pool warm-up query failed (non-critical): {warm_error}")
+        finally:
+            await conn.close()
+    
+    logger.info(f"🔥 Warmed {warmed}/{settings.db_pool_size} database connections")
+    return warmed
+
 # Graceful shutdown functions
 async def close_db_connections():
     """
@@ -518,78 +577,12 @@ async def check_connection_health():
             logger.error("❌ Auto-recovery failed - manual intervention required")
             return False, True
 
-# NUCLEAR OPTION: Completely fresh session for each request
+# Session from the shared pool, used by PipelineManager
 async def get_resilient_session_with_recovery():
     """
-    NUCLEAR OPTION: Create completely fresh database connection for each request
-    This bypasses ALL connection pooling issues by creating new connections
+    Get a database session from the shared connection pool.
+    No SELECT 1 probe is issued per session: pool_recycle retires aged connections, and a
+    connection that fails with a disconnect error is invalidated by SQLAlchemy so the next
+    checkout opens a fresh one. Set db_pool_pre_ping to also ping connections at checkout.
     """
-    max_retries = 2
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            # Create a NEW engine and session maker for this request only
-            fresh_engine = create_async_engine(
-                ASYNC_DATABASE_URL,
-                # Minimal configuration for single-use connection
-                pool_size=1,
-                max_overflow=0,
-                pool_timeout=5,
-                pool_pre_ping=False,
-                pool_recycle=-1,  # Never recycle since it's single-use
-                echo=False,
-            )
-            
-            fresh_session_maker = async_sessionmaker(
-                bind=fresh_engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
-            
-            # Create session from fresh engine
-            session = fresh_session_maker()
-            
-            # Test the connection
-            await session.execute(text("SELECT 1"))
-            logger.debug(f"✅ Fresh session created successfully (attempt {retry_count + 1})")
-            
-            # Return a wrapper that cleans up the engine when the session closes
-            class FreshSessionWrapper:
-                def __init__(self, session, engine):
-                    self._session = session
-                    self._engine = engine
-                    
-                async def execute(self, *args, **kwargs):
-                    return await self._session.execute(*args, **kwargs)
-                
-                async def commit(self):
-                    return await self._session.commit()
-                
-                async def rollback(self):
-                    return await self._session.rollback()
-                
-                async def close(self):
-                    try:
-                        await self._session.close()
-                    finally:
-                        await self._engine.dispose()
-                        logger.debug("🧹 Fresh engine disposed")
-                
-                def __getattr__(self, name):
-                    return getattr(self._session, name)
-            
-            return FreshSessionWrapper(session, fresh_engine)
-            
-        except Exception as session_error:
-            retry_count += 1
-            logger.warning(f"⚠️ Fresh session creation failed (attempt {retry_count}/{max_retries}): {session_error}")
-            
-            if retry_count >= max_retries:
-                logger.error("❌ CRITICAL: All fresh session attempts failed")
-                raise Exception(f"Failed to create fresh session after {max_retries} attempts: {session_error}")
-            
-            # Brief wait before retry
-            await asyncio.sleep(1)
-    
-    raise Exception("Fresh session creation failed - this should never be reached")
\ No newline at end of file
+    return AsyncSessionLocal()
@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime
 
@@ -36,6 +37,17 @@ async def lifespan(app: FastAPI):
     # Startup actions
     logger.info("🔄 Initializing default data...")
     run_startup_tasks()
+    try:
+        from app.database import warm_connection_pool
+        await warm_connection_pool()
+    except Exception as e:
+        logger.warning(f"⚠️ Connection pool warm-up skipped (non-critical): {e}")
+    try:
+        # Off the event loop and time-boxed: tiktoken may download the encoding if it isn't cached
+        from app.utils.token_counter import load_tokenizer
+        await asyncio.wait_for(asyncio.to_thread(load_tokenizer), timeout=15)
+    except Exception as e:
+        logger.warning(f"⚠️ Tokenizer load skipped, using character-based token estimates: {e!r}")
     logger.info("✅ Application startup completed")
     
     yield
@@ -44,6 +56,8 @@ async def lifespan(app: FastAPI):
     logger.info("🔄 Shutting down Threat Modeling API...")
     try:
         from app.database import close_db_connections
+        from app.core.llm.base import close_http_client
+        await close_http_client()
         await close_db_connections()
         logger.info("✅ Graceful shutdown completed")
     except Exception as e:
@@ -3,10 +3,11 @@ Data ingestion service for populating the knowledge base with threat intelligenc
 """
 import os
 import json
+import heapq
 import xml.etree.ElementTree as ET
 import httpx
+from operator import itemgetter
 from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 import logging
@@ -67,6 +68,9 @@ class IngestionService:
             cache_dir = os.getenv('SENTENCE_TRANSFORMERS_HOME', '/tmp/sentence_transformers_cache')
             os.makedirs(cache_dir, exist_ok=True)
             
+            # Imported here so importing this module doesn't pull in torch up front
+            from sentence_transformers import SentenceTransformer
+            
             # Try to load the model
             model = SentenceTransformer('all-MiniLM-L6-v2', cache_folder=cache_dir)
             logger.info("Successfully initialized SentenceTransformer model")
@@ -378,9 +382,9 @@ class IngestionService:
                         except:
                             similarities.append((entry, 0.0))
                     
-                    # Sort by similarity and take top N
-                    similarities.sort(key=lambda x: x[1], reverse=True)
-                    entries = [entry for entry, _ in similarities[:limit]]
+                    # Take top N by similarity without sorting the full list
+                    top = heapq.nlargest(limit, similarities, key=itemgetter(1))
+                    entries = [entry for entry, _ in top]
                 
                 # Convert to dictionaries
                 results = []
@@ -604,9 +608,9 @@ class IngestionService:
                     score = cosine_similarity(query_embedding, entry.embedding)
                     similarities.append((entry, score))
                 
-                # Sort by similarity and take top N
-                similarities.sort(key=lambda x: x[1], reverse=True)
-                entries = [entry for entry, _ in similarities[:limit]]
+                # Take top N by similarity without sorting the full list
+                top = heapq.nlargest(limit, similarities, key=itemgetter(1))
+                entries = [entry for entry, _ in top]
             
             # Convert to dictionaries
             results = []
@@ -80,13 +80,14 @@ class PipelineService:
     
     async def update_pipeline_status(self, pipeline_id: str, status: PipelineStatusEnum) -> bool:
         """Update pipeline status"""
+        now = datetime.utcnow()
         stmt = (
             update(Pipeline)
             .where(Pipeline.pipeline_id == pipeline_id)
             .values(
                 status=status,
-                updated_at=datetime.utcnow(),
-                completed_at=datetime.utcnow() if status == PipelineStatusEnum.COMPLETED else None
+                updated_at=now,
+                completed_at=now if status == PipelineStatusEnum.COMPLETED else None
             )
         )
         result = await self.session.execute(stmt)
@@ -1,7 +1,7 @@
 """Settings service for managing prompt templates"""
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, update, and_, or_
 from typing import List, Optional
 import logging
 
@@ -93,6 +93,39 @@ class SettingsService:
         logger.info(f"Created prompt template for {template_data.step_name}/{template_data.agent_type}")
         return template
     
+    async def create_missing_templates(
+        self,
+        templates_data: List[SystemPromptTemplateCreate]
+    ) -> int:
+        """
+        Create active templates for step/agent combinations that have none yet.
+        Reads existing active combinations in one query and inserts all missing ones in one commit.
+        """
+        query = select(SystemPromptTemplate.step_name, SystemPromptTemplate.agent_type).where(
+            SystemPromptTemplate.is_active == True
+        )
+        result = await self.db_session.execute(query)
+        existing = {(row.step_name, row.agent_type) for row in result}
+        
+        new_templates = [
+            SystemPromptTemplate(
+                step_name=template_data.step_name,
+                agent_type=template_data.agent_type,
+                system_prompt=template_data.system_prompt,
+                description=template_data.description,
+                is_active=True
+            )
+            for template_data in templates_data
+            if (template_data.step_name, template_data.agent_type) not in existing
+        ]
+        
+        if new_templates:
+            self.db_session.add_all(new_templates)
+            await self.db_session.commit()
+            logger.info(f"Created {len(new_templates)} prompt templates")
+        
+        return len(new_templates)
+    
     async def update_prompt_template(
         self,
         template_id: str,
@@ -151,16 +184,13 @@ class SettingsService:
         if exclude_id:
             conditions.append(SystemPromptTemplate.id != exclude_id)
         
-        query = select(SystemPromptTemplate).where(and_(*conditions))
+        # Single UPDATE instead of loading each template and flushing it individually
+        query = update(SystemPromptTemplate).where(and_(*conditions)).values(is_active=False)
         result = await self.db_session.execute(query)
-        existing_templates = result.scalars().all()
-        
-        for template in existing_templates:
-            template.is_active = False
         
-        if existing_templates:
+        if result.rowcount:
             await self.db_session.commit()
-            logger.info(f"Deactivated {len(existing_templates)} existing templates for {step_name}/{agent_type}")
+            logger.info(f"Deactivated {result.rowcount} existing templates for {step_name}/{agent_type}")
 
     async def get_system_prompt_for_step(
         self,
@@ -173,19 +203,27 @@ class SettingsService:
         Get the system prompt for a specific step and agent with optional few-shot learning.
         Returns custom prompt enhanced with user feedback examples if available.
         """
-        # Get base prompt
-        template = await self.get_active_prompt_template(step_name, agent_type)
+        # Get base prompt (only the prompt column; the rest of the template isn't needed here)
+        query = select(SystemPromptTemplate.system_prompt).where(
+            and_(
+                SystemPromptTemplate.step_name == step_name,
+                SystemPromptTemplate.agent_type == agent_type,
+                SystemPromptTemplate.is_active == True
+            )
+        )
+        result = await self.db_session.execute(query)
+        custom_prompt = result.scalar_one_or_none()
         
         base_prompt = None
-        if template:
-            logger.debug(f"Using custom prompt for {step_name}/{agent_type}")
-            base_prompt = template.system_prompt
+        if custom_prompt is not None:
+            logger.debug("Using custom prompt for %s/%s", step_name, agent_type)
+            base_prompt = custom_prompt
         elif fallback_prompt:
-            logger.debug(f"Using fallback prompt for {step_name}/{agent_type}")
+            logger.debug("Using fallback prompt for %s/%s", step_name, agent_type)
             base_prompt = fallback_prompt
         else:
             # Default generic prompt as last resort
-            logger.warning(f"No prompt found for {step_name}/{agent_type}, using generic default")
+            logger.warning("No prompt found for %s/%s, using generic default", step_name, agent_type)
             base_prompt = "You are a helpful AI assistant specialized in cybersecurity analysis."
         
         # Enhance with few-shot learning if enabled
@@ -201,13 +239,13 @@ class SettingsService:
                 )
                 
                 if enhanced_prompt != base_prompt:
-                    logger.info(f"Enhanced prompt with few-shot examples for {step_name}/{agent_type}")
+                    logger.info("Enhanced prompt with few-shot examples for %s/%s", step_name, agent_type)
                     return enhanced_prompt
                 else:
-                    logger.debug(f"No few-shot examples available for {step_name}/{agent_type}")
+                    logger.debug("No few-shot examples available for %s/%s", step_name, agent_type)
                     
             except Exception as e:
-                logger.error(f"Failed to enhance prompt with few-shot learning: {e}")
+                logger.error("Failed to enhance prompt with few-shot learning: %s", e)
                 # Fall through to return base prompt
         
         return base_prompt
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Event loop handling for Celery tasks"""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, TypeVar
+
+from app import database
+from app.core.llm.base import close_http_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _run_with_cleanup(coro: Coroutine[Any, Any, T]) -> T:
+    """Await the task body, then release resources bound to the task's event loop."""
+    try:
+        return await coro
+    finally:
+        await close_http_client()
+        try:
+            # asyncpg connections belong to the loop that opened them. Close this task's pooled
+            # connections so the next task, running in a new loop, never checks one out.
+            await database.async_engine.dispose()
+        except Exception as e:
+            logger.warning(f"⚠️ Connection pool disposal after task failed: {e}")
+
+
+def run_task_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a task's async body in a fresh event loop (one per task, like asyncio.run).
+    The shared LLM HTTP client and the async engine's pooled connections are bound to
+    that loop, so both are released before the loop ends.
+    """
+    return asyncio.run(_run_with_cleanup(coro))
@@ -5,7 +5,7 @@ from typing import Dict, Any
 from celery import current_task
 from app.celery_app import celery_app
 from app.services.ingestion_service import IngestionService
-import asyncio
+from app.tasks.event_loop import run_task_coroutine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,15 +34,7 @@ def ingest_knowledge_base(self, url: str, source_name: str) -> Dict[str, Any]:
         service = IngestionService()
         
         # Run the async ingestion in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(
-                service.ingest_from_url(url, source_name)
-            )
-        finally:
-            loop.close()
+        result = run_task_coroutine(service.ingest_from_url(url, source_name))
         
         # Update task state with result
         current_task.update_state(
@@ -84,22 +76,16 @@ def ingest_cwe_database(self, xml_url: str = None, xml_file_path: str = None) ->
         # Create ingestion service
         service = IngestionService()
         
-        # Run the async ingestion in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Update progress
+        current_task.update_state(
+            state='PROGRESS',
+            meta={'status': 'Downloading and parsing CWE data...'}
+        )
         
-        try:
-            # Update progress
-            current_task.update_state(
-                state='PROGRESS',
-                meta={'status': 'Downloading and parsing CWE data...'}
-            )
-            
-            result = loop.run_until_complete(
-                service.ingest_cwe_from_xml(xml_file_path=xml_file_path, xml_url=xml_url)
-            )
-        finally:
-            loop.close()
+        # Run the async ingestion in a new event loop
+        result = run_task_coroutine(
+            service.ingest_cwe_from_xml(xml_file_path=xml_file_path, xml_url=xml_url)
+        )
         
         # Update task state with result
         if result.get('status') == 'success':
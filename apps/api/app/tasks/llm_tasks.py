@@ -1,6 +1,5 @@
 """LLM-specific background tasks for compute-intensive operations"""
 
-import asyncio
 import logging
 from typing import Dict, Any, Optional
 from celery import current_task
@@ -11,6 +10,7 @@ from app.core.llm import get_llm_provider
 from app.core.pipeline.dfd_extraction_service import extract_dfd_from_text, validate_dfd_components
 from app.database import AsyncSessionLocal
 from app.services import PipelineService
+from app.tasks.event_loop import run_task_coroutine
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +42,7 @@ def extract_dfd_task(self, pipeline_id: str, document_text: str, llm_config: Opt
         )
         
         # Run async DFD extraction
-        result = asyncio.run(_extract_dfd_async(pipeline_id, document_text, llm_config))
+        result = run_task_coroutine(_extract_dfd_async(pipeline_id, document_text, llm_config))
         
         # Update final status
         current_task.update_state(
@@ -159,7 +159,7 @@ def generate_threats_task(self, pipeline_id: str, dfd_components: Dict[str, Any]
             }
         )
         
-        result = asyncio.run(_generate_threats_async(pipeline_id, dfd_components, llm_config))
+        result = run_task_coroutine(_generate_threats_async(pipeline_id, dfd_components, llm_config))
         
         current_task.update_state(
             state='SUCCESS',
@@ -11,6 +11,7 @@ from app.core.pipeline.manager import PipelineManager, PipelineStep
 from app.database import AsyncSessionLocal
 from app.services import PipelineService
 from app.models import StepStatus
+from app.tasks.event_loop import run_task_coroutine
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +54,7 @@ def execute_pipeline_step(self, pipeline_id: str, step: str, data: Dict[str, Any
         _send_websocket_update_sync(pipeline_id, step, "progress", task_id)
         
         # Run the async operation in sync context
-        result = asyncio.run(_execute_step_async(pipeline_id, step_enum, data, task_id))
+        result = run_task_coroutine(_execute_step_async(pipeline_id, step_enum, data, task_id))
         
         # Update final status
         current_task.update_state(
@@ -202,7 +203,7 @@ def execute_full_pipeline(self, pipeline_id: str, start_step: str = "document_up
             )
             
             # Execute step
-            step_result = asyncio.run(_execute_step_async(
+            step_result = run_task_coroutine(_execute_step_async(
                 pipeline_id, 
                 PipelineStep(step), 
                 {}  # Use data from previous steps stored in database
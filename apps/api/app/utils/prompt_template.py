@@ -0,0 +1,34 @@
+"""Precompiled prompt templates"""
+
+from string import Formatter
+from typing import Any, List, Optional, Tuple
+
+
+class PromptTemplate:
+    """
+    A str.format-style prompt template parsed once at creation.
+
+    Rendering only joins the pre-split literal segments with the field values,
+    instead of re-parsing the (often multi-KB) template string on every call.
+    Supports plain named fields like {document_text}; doubled braces are literals.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._segments: List[Tuple[str, Optional[str]]] = []
+
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+                raise ValueError(f"Unsupported prompt template field: {{{field_name}}}")
+            self._segments.append((literal, field_name))
+
+        self.fields = frozenset(name for _, name in self._segments if name is not None)
+
+    def render(self, **values: Any) -> str:
+        """Fill the template fields with the given values."""
+        parts = []
+        for literal, field_name in self._segments:
+            parts.append(literal)
+            if field_name is not None:
+                parts.append(str(values[field_name]))
+        return "".join(parts)
@@ -6,6 +6,31 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+TOKENIZER_ENCODING = "cl100k_base"
+
+# BPE tokenizer, set by load_tokenizer() at process startup. It is never loaded on first use:
+# without a cached copy (TIKTOKEN_CACHE_DIR) tiktoken downloads the encoding with a blocking
+# request, which must not run on the event loop. Until it is loaded the char estimate is used.
+_tokenizer = None
+
+
+def load_tokenizer() -> bool:
+    """
+    Load the tiktoken encoding (blocking - call from a thread or at process startup).
+    Returns True if the tokenizer is available, False to keep the character-based estimate.
+    """
+    global _tokenizer
+    if _tokenizer is not None:
+        return True
+    try:
+        import tiktoken
+        _tokenizer = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken unavailable, using character-based token estimates: {e}")
+        return False
+
+
 class TokenCounter:
     """Utility for counting tokens and estimating costs"""
     
@@ -32,6 +57,29 @@ class TokenCounter:
             return 0
         return max(1, len(text) // cls.CHARS_PER_TOKEN)
     
+    @classmethod
+    def truncate_to_tokens(cls, text: str, max_tokens: int) -> str:
+        """
+        Truncate text to at most max_tokens tokens.
+        Uses the real tokenizer once load_tokenizer() has loaded it; otherwise cuts on
+        the character estimate at the last whitespace so no word is split.
+        """
+        if not text:
+            return text
+        
+        tokenizer = _tokenizer
+        if tokenizer is not None:
+            token_ids = tokenizer.encode(text)
+            if len(token_ids) <= max_tokens:
+                return text
+            return tokenizer.decode(token_ids[:max_tokens])
+        
+        max_chars = max_tokens * cls.CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        cut = text.rfind(' ', 0, max_chars + 1)
+        return text[:cut if cut > 0 else max_chars]
+    
     @classmethod
     def estimate_cost(cls, input_tokens: int, output_tokens: int, model: str = "default") -> Dict[str, Any]:
         """
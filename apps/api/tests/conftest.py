@@ -0,0 +1,21 @@
+"""Shared test fixtures"""
+
+import pytest
+
+from app.core.pipeline.steps.analyzer_agents import BaseAnalyzerAgent, MultiAgentOrchestrator
+
+
+@pytest.fixture(autouse=True)
+def clear_agent_caches():
+    """Agent and orchestrator caches are class-level, so reset them around every test."""
+    def clear():
+        BaseAnalyzerAgent._system_prompt_cache.clear()
+        BaseAnalyzerAgent._output_token_history.clear()
+        BaseAnalyzerAgent._response_cache.clear()
+        BaseAnalyzerAgent._negative_cache.clear()
+        MultiAgentOrchestrator._result_cache.clear()
+        MultiAgentOrchestrator._inflight.clear()
+    
+    clear()
+    yield
+    clear()
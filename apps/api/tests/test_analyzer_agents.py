@@ -0,0 +1,307 @@
+"""Tests for the analyzer agents' streaming, caching and output sizing"""
+
+import asyncio
+import json
+from collections import deque
+
+import pytest
+
+from app.core.pipeline.steps import analyzer_agents
+from app.core.pipeline.steps.analyzer_agents import ArchitecturalRiskAgent, BaseAnalyzerAgent, MultiAgentOrchestrator
+
+
+class FakeStreamingProvider:
+    """LLM provider that streams fixed chunks and reports a finish_reason."""
+    
+    model = "fake-model"
+    
+    def __init__(self, chunks, finish_reason="stop"):
+        self.chunks = chunks
+        self.finish_reason = finish_reason
+        self.calls = 0
+    
+    async def stream_generate(self, prompt, system_prompt=None, temperature=0.7, max_tokens=None, stream_metadata=None):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+        if stream_metadata is not None:
+            stream_metadata["finish_reason"] = self.finish_reason
+
+
+def threats_json(*names):
+    return json.dumps([{"threat_name": name, "description": "d", "potential_impact": "High"} for name in names])
+
+
+@pytest.fixture
+def use_provider(monkeypatch):
+    """Make the agents use the given fake provider."""
+    def install(provider):
+        async def get_provider(step="default"):
+            return provider
+        monkeypatch.setattr(analyzer_agents, "get_llm_provider", get_provider)
+        return provider
+    return install
+
+
+DFD = {"processes": ["API Gateway"], "data_stores": ["Orders DB"]}
+
+
+def test_truncated_responses_do_not_shrink_max_tokens(use_provider):
+    agent = ArchitecturalRiskAgent()
+    BaseAnalyzerAgent._output_token_history[agent.agent_type] = deque(
+        [1500] * agent.OUTPUT_HISTORY_MIN_SAMPLES, maxlen=agent.OUTPUT_HISTORY_WINDOW
+    )
+    limit_before = agent._adaptive_max_tokens()
+    
+    # Short, cut-off responses: one stopped at max_tokens, one with an unclosed array
+    samples = [
+        FakeStreamingProvider([threats_json("A")], finish_reason="length"),
+        FakeStreamingProvider(['[{"threat_name": "A"}, {"threat_name": "B", "descr']),
+    ]
+    for index, provider in enumerate(samples * 10):
+        use_provider(provider)
+        asyncio.run(agent.analyze(f"document {index}", DFD, []))
+    
+    assert agent._adaptive_max_tokens() == limit_before
+    assert len(BaseAnalyzerAgent._output_token_history[agent.agent_type]) == agent.OUTPUT_HISTORY_MIN_SAMPLES
+
+
+def test_complete_responses_are_recorded(use_provider):
+    agent = ArchitecturalRiskAgent()
+    use_provider(FakeStreamingProvider([threats_json("A", "B")]))
+    
+    asyncio.run(agent.analyze("document", DFD, []))
+    
+    assert len(BaseAnalyzerAgent._output_token_history[agent.agent_type]) == 1
+
+
+class InterruptedProvider(FakeStreamingProvider):
+    """Provider whose stream breaks with a network error after its chunks."""
+    
+    async def stream_generate(self, prompt, system_prompt=None, temperature=0.7, max_tokens=None, stream_metadata=None):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+        raise ConnectionError("stream reset")
+
+
+def run_stream(provider):
+    agent = ArchitecturalRiskAgent()
+    return asyncio.run(agent._generate_threats_streaming(provider, "prompt", temperature=0.3, max_tokens=100))
+
+
+def threat_names(threats):
+    return [threat["threat_name"] for threat in threats]
+
+
+def test_stream_complete_array_split_across_chunks():
+    content = threats_json("A", "B")
+    _, threats, complete = run_stream(FakeStreamingProvider([content[:20], content[20:45], content[45:]]))
+    
+    assert threat_names(threats) == ["A", "B"]
+    assert complete
+
+
+def test_stream_unclosed_array_is_incomplete():
+    _, threats, complete = run_stream(
+        FakeStreamingProvider(['[{"threat_name":"A"}, {"threat_name": "B", "d": "trunc'])
+    )
+    
+    assert threat_names(threats) == ["A"]
+    assert not complete
+
+
+def test_stream_stopped_at_max_tokens_is_incomplete():
+    _, threats, complete = run_stream(FakeStreamingProvider([threats_json("A")], finish_reason="length"))
+    
+    assert threat_names(threats) == ["A"]
+    assert not complete
+
+
+def test_stream_interrupted_after_threats_returns_partial():
+    _, threats, complete = run_stream(InterruptedProvider(['[{"threat_name":"A"}, {"threat_na']))
+    
+    assert threat_names(threats) == ["A"]
+    assert not complete
+
+
+def test_stream_interrupted_before_any_threat_raises():
+    with pytest.raises(ConnectionError):
+        run_stream(InterruptedProvider(['[{"threat_na']))
+
+
+def test_stream_wrapped_in_code_fence():
+    _, threats, complete = run_stream(FakeStreamingProvider(["```json\n", threats_json("A", "B"), "\n```"]))
+    
+    assert threat_names(threats) == ["A", "B"]
+    assert complete
+
+
+def test_stream_single_object_falls_back_to_full_parse():
+    _, threats, complete = run_stream(FakeStreamingProvider(['{"threat_name": "A"}']))
+    
+    assert threat_names(threats) == ["A"]
+    assert complete
+
+
+def test_agent_reuses_cached_threats_for_identical_prompt(use_provider):
+    agent = ArchitecturalRiskAgent()
+    provider = use_provider(FakeStreamingProvider([threats_json("A")]))
+    
+    first = asyncio.run(agent.analyze("document", DFD, []))
+    second = asyncio.run(agent.analyze("document", DFD, []))
+    
+    assert provider.calls == 1
+    assert threat_names(second) == threat_names(first) == ["A"]
+
+
+def test_agent_does_not_cache_incomplete_threats(use_provider):
+    agent = ArchitecturalRiskAgent()
+    provider = use_provider(FakeStreamingProvider([threats_json("A")], finish_reason="length"))
+    
+    asyncio.run(agent.analyze("document", DFD, []))
+    asyncio.run(agent.analyze("document", DFD, []))
+    
+    assert provider.calls == 2
+    assert not BaseAnalyzerAgent._response_cache
+
+
+def test_agent_remembers_explicit_empty_answer(use_provider):
+    agent = ArchitecturalRiskAgent()
+    provider = use_provider(FakeStreamingProvider(["[]"]))
+    
+    assert asyncio.run(agent.analyze("document", DFD, [])) == []
+    assert asyncio.run(agent.analyze("document", DFD, [])) == []
+    assert provider.calls == 1
+
+
+def test_agent_negative_cache_expires(use_provider, monkeypatch):
+    agent = ArchitecturalRiskAgent()
+    provider = use_provider(FakeStreamingProvider(["[]"]))
+    
+    asyncio.run(agent.analyze("document", DFD, []))
+    monkeypatch.setattr(BaseAnalyzerAgent, "NEGATIVE_CACHE_TTL", 0.0)
+    asyncio.run(agent.analyze("document", DFD, []))
+    
+    assert provider.calls == 2
+
+
+class CountingOrchestrator:
+    """Replaces every agent's analyze() with a counting stub."""
+    
+    def __init__(self, monkeypatch, fail=None, incomplete=None):
+        self.orchestrator = MultiAgentOrchestrator()
+        self.calls = 0
+        for agent in self.orchestrator.agents:
+            monkeypatch.setattr(agent, "analyze", self._stub(agent, fail, incomplete))
+    
+    def _stub(self, agent, fail, incomplete):
+        async def analyze(document_text, dfd_components, existing_threats, db_session=None):
+            self.calls += 1
+            if agent.agent_type == fail:
+                raise RuntimeError("agent crashed")
+            if agent.agent_type == incomplete:
+                agent._mark_incomplete()
+            return [{"threat_name": agent.name, "potential_impact": "High"}]
+        return analyze
+    
+    def run(self, document_text="document"):
+        return asyncio.run(self.orchestrator.analyze_system(document_text, DFD, []))
+
+
+def test_orchestrator_reuses_findings_for_identical_input(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch)
+    
+    first = counting.run()
+    second = counting.run()
+    
+    assert counting.calls == 3
+    assert second["consolidated_threats"] == first["consolidated_threats"]
+    assert second is not first
+
+
+def test_orchestrator_result_cache_expires(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch)
+    
+    counting.run()
+    monkeypatch.setattr(MultiAgentOrchestrator, "RESULT_CACHE_TTL", 0.0)
+    counting.run()
+    
+    assert counting.calls == 6
+
+
+def test_invalidate_caches_drops_findings(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch)
+    
+    counting.run()
+    MultiAgentOrchestrator.invalidate_caches()
+    counting.run()
+    
+    assert counting.calls == 6
+
+
+def test_orchestrator_key_includes_resolved_prompts(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch)
+    
+    counting.run()
+    monkeypatch.setattr(counting.orchestrator.agents[0], "fallback_prompt", "A different system prompt")
+    counting.run()
+    
+    assert counting.calls == 6
+
+
+def test_failed_agent_results_are_not_cached(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch, fail="business_financial")
+    
+    first = counting.run()
+    counting.run()
+    
+    assert counting.calls == 6
+    assert first["summary"]["business_risks"] == 0
+    assert not MultiAgentOrchestrator._result_cache
+
+
+def test_incomplete_agent_results_are_not_cached(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch, incomplete="compliance_governance")
+    
+    counting.run()
+    counting.run()
+    
+    assert counting.calls == 6
+    assert not MultiAgentOrchestrator._result_cache
+
+
+def test_concurrent_identical_analyses_share_one_run(monkeypatch):
+    counting = CountingOrchestrator(monkeypatch)
+    
+    async def run_twice():
+        return await asyncio.gather(
+            counting.orchestrator.analyze_system("document", DFD, []),
+            counting.orchestrator.analyze_system("document", DFD, [])
+        )
+    
+    first, second = asyncio.run(run_twice())
+    
+    assert counting.calls == 3
+    assert first["consolidated_threats"] == second["consolidated_threats"]
+    assert not MultiAgentOrchestrator._inflight
+
+
+def test_prioritize_threats_orders_by_agent_potential_impact():
+    threats = [
+        {"threat_name": "low", "potential_impact": "Low", "agent_source": "Architectural Risk Agent"},
+        {"threat_name": "critical", "potential_impact": "Critical", "agent_source": "Architectural Risk Agent"},
+        {"threat_name": "unknown", "agent_source": "Architectural Risk Agent"},
+        {"threat_name": "high-business", "potential_impact": "High", "agent_source": "Business & Financial Risk Agent"},
+        {"threat_name": "high-compliance", "potential_impact": "High", "agent_source": "Compliance & Governance Agent"},
+        {"threat_name": "legacy-critical", "Potential Impact": "Critical", "agent_source": "Business & Financial Risk Agent"},
+    ]
+    
+    prioritized = MultiAgentOrchestrator()._prioritize_threats(threats)
+    
+    # Severity first (legacy 'Potential Impact' still read, missing ranks as Medium),
+    # then agent_source descending within a severity
+    assert threat_names(prioritized) == [
+        "legacy-critical", "critical", "high-compliance", "high-business", "unknown", "low"
+    ]
+    assert [threat["multi_agent_priority"] for threat in prioritized] == [1, 2, 3, 4, 5, 6]
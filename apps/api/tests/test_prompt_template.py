@@ -0,0 +1,45 @@
+"""Tests for precompiled prompt templates"""
+
+import pytest
+
+from app.utils.prompt_template import PromptTemplate
+
+
+def test_render_matches_str_format():
+    template = "Analyze {document} for {focus}.\nComponents: {document}"
+    
+    rendered = PromptTemplate(template).render(document="the doc", focus="risks")
+    
+    assert rendered == template.format(document="the doc", focus="risks")
+
+
+def test_escaped_braces_render_as_literals():
+    template = 'Return JSON like {{"threat_name": "..."}} for {document}'
+    prompt = PromptTemplate(template)
+    
+    assert prompt.fields == frozenset({"document"})
+    assert prompt.render(document="doc") == 'Return JSON like {"threat_name": "..."} for doc'
+
+
+def test_values_containing_braces_are_not_reparsed():
+    prompt = PromptTemplate("Data: {extracted_data}")
+    
+    assert prompt.render(extracted_data='{"a": "{b}"}') == 'Data: {"a": "{b}"}'
+
+
+def test_template_without_fields():
+    prompt = PromptTemplate("No fields {{here}}")
+    
+    assert prompt.fields == frozenset()
+    assert prompt.render() == "No fields {here}"
+
+
+@pytest.mark.parametrize("template", ["{value!r}", "{value:>10}", "{items[0]}", "{obj.attr}", "{0}"])
+def test_unsupported_fields_are_rejected(template):
+    with pytest.raises(ValueError):
+        PromptTemplate(template)
+
+
+def test_missing_value_raises_key_error():
+    with pytest.raises(KeyError):
+        PromptTemplate("{document}").render()
@@ -0,0 +1,76 @@
+"""Tests for token-budget truncation"""
+
+import pytest
+
+from app.utils import token_counter
+from app.utils.token_counter import TokenCounter
+
+
+@pytest.fixture
+def no_tokenizer(monkeypatch):
+    monkeypatch.setattr(token_counter, "_tokenizer", None)
+
+
+class FakeTokenizer:
+    """One token per character."""
+    
+    def encode(self, text):
+        return [ord(char) for char in text]
+    
+    def decode(self, token_ids):
+        return "".join(chr(token_id) for token_id in token_ids)
+
+
+@pytest.mark.parametrize("text", ["", None])
+def test_empty_text_is_returned_unchanged(no_tokenizer, text):
+    assert TokenCounter.truncate_to_tokens(text, 10) == text
+
+
+def test_fallback_keeps_text_at_exact_budget(no_tokenizer):
+    text = "a" * (10 * TokenCounter.CHARS_PER_TOKEN)
+    
+    assert TokenCounter.truncate_to_tokens(text, 10) == text
+
+
+def test_fallback_cuts_at_last_whitespace(no_tokenizer):
+    text = "word " * 20  # 100 characters
+    
+    truncated = TokenCounter.truncate_to_tokens(text, 10)
+    
+    assert len(truncated) <= 10 * TokenCounter.CHARS_PER_TOKEN
+    assert truncated == text[:truncated.rfind("word") + 4]
+    assert not truncated.endswith(" ")
+
+
+def test_fallback_keeps_word_ending_exactly_at_budget(no_tokenizer):
+    text = "abc def ghi"  # a space sits right after the 8-character budget
+    
+    assert TokenCounter.truncate_to_tokens(text, 2) == "abc def"
+
+
+def test_fallback_hard_cuts_text_without_whitespace(no_tokenizer):
+    text = "x" * 100
+    
+    assert TokenCounter.truncate_to_tokens(text, 10) == "x" * (10 * TokenCounter.CHARS_PER_TOKEN)
+
+
+def test_tokenizer_truncates_by_token_count(monkeypatch):
+    monkeypatch.setattr(token_counter, "_tokenizer", FakeTokenizer())
+    
+    assert TokenCounter.truncate_to_tokens("abcdefgh", 8) == "abcdefgh"
+    assert TokenCounter.truncate_to_tokens("abcdefgh", 5) == "abcde"
+
+
+def test_failed_tokenizer_load_keeps_char_estimate(monkeypatch, no_tokenizer):
+    import builtins
+    real_import = builtins.__import__
+    
+    def fail_tiktoken(name, *args, **kwargs):
+        if name == "tiktoken":
+            raise ImportError("no tiktoken")
+        return real_import(name, *args, **kwargs)
+    
+    monkeypatch.setattr(builtins, "__import__", fail_tiktoken)
+    
+    assert token_counter.load_tokenizer() is False
+    assert TokenCounter.truncate_to_tokens("x" * 100, 10) == "x" * 40